@@ -61,6 +61,97 @@ SESSION_COOKIE_SECURE = not DEBUG  # Use secure cookies in production
 # Using Brevo's Transactional Email API instead of SMTP
 BREVO_API_KEY = os.getenv('BREVO_API_KEY')
 BREVO_SENDER_EMAIL = os.getenv('BREVO_SENDER_EMAIL')
+BREVO_POOL_MAXSIZE = int(os.getenv('BREVO_POOL_MAXSIZE', '10'))  # keep-alive connections shared per process
+BREVO_CONNECT_TIMEOUT = float(os.getenv('BREVO_CONNECT_TIMEOUT', '5'))
+BREVO_READ_TIMEOUT = float(os.getenv('BREVO_READ_TIMEOUT', '15'))
+
+# Email outbox - emails are queued by request handlers and sent by
+# `python manage.py process_email_outbox`. Use courses.email_outbox.FakeTransport
+# to run the worker offline.
+EMAIL_OUTBOX_TRANSPORT = os.getenv('EMAIL_OUTBOX_TRANSPORT', 'courses.email_outbox.BrevoTransport')
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+EMAIL_OUTBOX_BACKOFF_SECONDS = 30
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = 3600
+EMAIL_OUTBOX_LEASE_SECONDS = 300
+# Registration OTPs are valid this long; their emails are expired, not
+# retried, once it has passed
+OTP_EXPIRY_MINUTES = 10
+
+# Login notifications - only new devices are emailed, repeat logins from the
+# same IP + user agent inside the window are coalesced (see courses/notification_policy.py).
+# Known devices must be remembered by every worker and survive restarts, so
+# LOGIN_NOTIFICATION_CACHE (below) is Redis or the database, never process memory.
+LOGIN_NOTIFICATION_WINDOW_SECONDS = 6 * 60 * 60
+LOGIN_NOTIFICATION_DEVICE_TTL_SECONDS = 90 * 24 * 60 * 60
+
+# Caches: 'default' is shared by all processes (Redis when REDIS_URL is set,
+# otherwise per-process memory), 'local' is a small per-process tier in
+# front of it for the hottest entries. Production with more than one worker
+# needs REDIS_URL: without it cache bumps (catalog, quiz versions) only reach
+# the process that made them.
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Without Redis: a database table, created by migration 0018 (or `manage.py createcachetable`)
+    'login_notifications': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'login_notification_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+LOGIN_NOTIFICATION_CACHE = 'login_notifications'
+
+# /api/courses/ response cache (courses/catalog_cache.py)
+CATALOG_CACHE_TIMEOUT = 10 * 60
+CATALOG_LOCAL_CACHE_TIMEOUT = 30
+CATALOG_CACHE_LOCK_TIMEOUT = 10  # longest a rebuild may hold the lock
+CATALOG_CACHE_LOCK_WAIT = 2  # how long others wait for it before building themselves
+
+# Per-user course access sets (courses/entitlements.py), invalidated on
+# Payment/Enrollment changes. Only cached across requests in a cache all
+# workers share; without Redis they are memoized per request only.
+ENTITLEMENTS_CACHE = 'default' if REDIS_URL else None
+ENTITLEMENTS_CACHE_TIMEOUT = 60 * 60
+
+# Per-request timings (courses/request_timing.py): DB, template and outbound
+# PayPal/Brevo/Cloudinary time in a Server-Timing header and a JSON log line
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True') == 'True'
+
+# Repeated-query (N+1) detector (courses/nplusone.py). Strict mode raises
+# NPlusOneError instead of logging, for tests and check_endpoint_budgets.
+NPLUSONE_DETECTION = os.getenv('NPLUSONE_DETECTION', 'False') == 'True'
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', '5'))
+NPLUSONE_STRICT = os.getenv('NPLUSONE_STRICT', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'courses.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 # Keep Django email backend for compatibility
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend'
@@ -89,6 +180,12 @@ INSTALLED_APPS = [
     'courses',
 ]
 
+REST_FRAMEWORK = {
+    # Opt-in keyset pagination: only applied when ?page_size= or ?cursor= is sent
+    'DEFAULT_PAGINATION_CLASS': 'courses.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+}
+
 AUTH_USER_MODEL = 'courses.CustomUser'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -96,6 +193,9 @@ LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
 MIDDLEWARE = [
+    'courses.request_timing.ServerTimingMiddleware',  # Server-Timing header + per-request log line
+    'courses.nplusone.NPlusOneMiddleware',  # Only active with NPLUSONE_DETECTION=True
+    'courses.db_router.ReplicaRoutingMiddleware',  # Outside SessionMiddleware so session writes pin to the primary
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -110,7 +210,7 @@ ROOT_URLCONF = 'core_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'courses.request_timing.TimedDjangoTemplates',  # DjangoTemplates + render timing
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -129,19 +229,74 @@ WSGI_APPLICATION = 'core_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DB_PROFILE=postgres (default when DATABASE_URL is set) or sqlite (offline
+# development and benchmarking, default otherwise).
+#
+# PostgreSQL connections are kept open for DB_CONN_MAX_AGE seconds and
+# health-checked before reuse. DB_POOL=True uses psycopg 3's connection pool
+# instead (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE connections per process,
+# waiting at most DB_POOL_TIMEOUT seconds for a free one).
 DATABASE_URL = os.getenv("DATABASE_URL")
-tmpPostgres = urlparse(DATABASE_URL)
-DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': tmpPostgres.path.replace('/', ''),
-            'USER': tmpPostgres.username,
-            'PASSWORD': tmpPostgres.password,
-            'HOST': tmpPostgres.hostname,
-            'PORT': 5432,
-            'OPTIONS': dict(parse_qsl(tmpPostgres.query)),
+DB_PROFILE = os.getenv('DB_PROFILE', 'postgres' if DATABASE_URL else 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+
+def postgres_database(url):
+    parsed = urlparse(url)
+    options = dict(parse_qsl(parsed.query))
+    if DB_POOL:
+        options['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
         }
-}
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': parsed.path.replace('/', ''),
+        'USER': parsed.username,
+        'PASSWORD': parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
+        # The pool manages connection lifetime itself
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': options,
+    }
+
+
+def sqlite_database(path):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            # WAL lets readers run while a request writes; IMMEDIATE avoids
+            # "database is locked" on concurrent write transactions.
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
+
+if DB_PROFILE == 'sqlite':
+    DATABASES = {'default': sqlite_database(os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'))}
+    replicas = [sqlite_database(path) for path in os.getenv('SQLITE_REPLICA_PATHS', '').split(',') if path]
+else:
+    DATABASES = {'default': postgres_database(DATABASE_URL)}
+    replicas = [postgres_database(url) for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+
+# Read replicas (courses/db_router.py): GET requests to replica-safe views
+# read from a random replica, except for READ_REPLICA_STICKY_SECONDS after
+# the same browser wrote something.
+for number, replica in enumerate(replicas, start=1):
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{number}'] = replica
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['courses.db_router.ReplicaRouter']
+READ_REPLICA_STICKY_SECONDS = int(os.getenv('READ_REPLICA_STICKY_SECONDS', '10'))
 
 
 # Password validation
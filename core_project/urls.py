@@ -11,13 +11,14 @@ from django.conf.urls.static import static
 # ==============================================================================
 
 from rest_framework.routers import DefaultRouter
-from courses.views import UserViewSet, CourseViewSet, EnrollmentViewSet, CourseOfferingViewSet, PaymentViewSet
+from courses.views import UserViewSet, CourseViewSet, CatalogViewSet, EnrollmentViewSet, CourseOfferingViewSet, PaymentViewSet
 
 # ROUTER: This automatically creates API URLs for us
 # e.g., 'api/users/', 'api/users/1/', 'api/courses/' ...
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'courses', CourseViewSet)
+router.register(r'catalog', CatalogViewSet, basename='catalog') # Courses + the user's enrollment/payment state
 router.register(r'enrollments', EnrollmentViewSet)
 router.register(r'offerings', CourseOfferingViewSet) # New Endpoint for Teachers
 router.register(r'payments', PaymentViewSet) # Payment endpoint
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Course, CourseOffering, Enrollment
+from .models import CustomUser, Course, CourseOffering, Enrollment, EmailOutbox
 
 # --- USER ADMIN ---
 @admin.register(CustomUser)
@@ -41,3 +41,10 @@ class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('student', 'course_offering', 'enrolled_at', 'grade')
     list_filter = ('course_offering__course', 'course_offering__semester')
     search_fields = ('student__username', 'course_offering__course__title')
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
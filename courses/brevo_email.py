@@ -1,52 +1,84 @@
 """
 Brevo Email Service using Transactional Email API
 This module provides email sending functionality using Brevo's API instead of SMTP.
+
+A single pooled API client is shared by the whole process, so connections
+(and their TLS sessions) are kept alive and reused across emails.
 """
+import threading
+
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 from django.conf import settings
 
+# Brevo accepts at most this many message versions in one transactional call
+BREVO_MAX_MESSAGE_VERSIONS = 1000
+
+_api_instance = None
+_api_key = None
+_api_lock = threading.Lock()
+
+
+def get_transactional_api():
+    """
+    Return the process-wide TransactionalEmailsApi, creating it on first use.
+
+    The underlying urllib3 pool keeps up to BREVO_POOL_MAXSIZE keep-alive
+    connections, which is enough for the outbox worker's parallel sends.
+    """
+    global _api_instance, _api_key
+    if _api_instance is None or _api_key != settings.BREVO_API_KEY:
+        with _api_lock:
+            if _api_instance is None or _api_key != settings.BREVO_API_KEY:
+                configuration = sib_api_v3_sdk.Configuration()
+                configuration.api_key['api-key'] = settings.BREVO_API_KEY
+                configuration.connection_pool_maxsize = settings.BREVO_POOL_MAXSIZE
+                _api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+                _api_key = settings.BREVO_API_KEY
+    return _api_instance
+
+
+def _request_timeout():
+    return (settings.BREVO_CONNECT_TIMEOUT, settings.BREVO_READ_TIMEOUT)
+
 
 def send_brevo_email(to_email, subject, html_content, sender_name="Learning Platform"):
     """
     Send email using Brevo Transactional Email API
-    
+
     Args:
         to_email (str): Recipient email address
         subject (str): Email subject
         html_content (str): HTML content of the email
         sender_name (str): Name of the sender
-    
+
     Returns:
         dict: {'success': bool, 'message': str}
     """
     try:
-        configuration = sib_api_v3_sdk.Configuration()
-        configuration.api_key['api-key'] = settings.BREVO_API_KEY
-        api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
-        
+        api_instance = get_transactional_api()
 
         sender = {
             "name": sender_name,
             "email": settings.BREVO_SENDER_EMAIL
         }
-        
+
         to = [{"email": to_email}]
-        
+
         send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
             to=to,
             sender=sender,
             subject=subject,
             html_content=html_content
         )
-        
-        api_response = api_instance.send_transac_email(send_smtp_email)
-        
+
+        api_response = api_instance.send_transac_email(send_smtp_email, _request_timeout=_request_timeout())
+
         return {
             'success': True,
             'message': f'Email sent successfully. Message ID: {api_response.message_id}'
         }
-        
+
     except ApiException as e:
         return {
             'success': False,
@@ -57,3 +89,73 @@ def send_brevo_email(to_email, subject, html_content, sender_name="Learning Plat
             'success': False,
             'message': f'Error sending email: {str(e)}'
         }
+
+
+def send_brevo_bulk_email(recipients, subject, html_content, sender_name="Learning Platform"):
+    """
+    Send one email to many recipients using Brevo message versions.
+
+    Every recipient gets an individual message (nobody sees the other
+    addresses), but up to BREVO_MAX_MESSAGE_VERSIONS of them go out in a
+    single API call. `html_content` may use Brevo `{{ params.name }}`
+    placeholders filled from each recipient's params.
+
+    Args:
+        recipients (list): Email strings, or dicts with 'email' and optional
+            'name', 'params' and 'subject' keys
+        subject (str): Default email subject
+        html_content (str): HTML content shared by every version
+        sender_name (str): Name of the sender
+
+    Returns:
+        dict: {'success': bool, 'message': str, 'sent': int, 'failed': int, 'message_ids': list}
+    """
+    sender = {
+        "name": sender_name,
+        "email": settings.BREVO_SENDER_EMAIL
+    }
+
+    versions = []
+    for recipient in recipients:
+        if isinstance(recipient, str):
+            recipient = {'email': recipient}
+        to = {"email": recipient['email']}
+        if recipient.get('name'):
+            to["name"] = recipient['name']
+        versions.append(sib_api_v3_sdk.SendSmtpEmailMessageVersions(
+            to=[to],
+            params=recipient.get('params'),
+            subject=recipient.get('subject'),
+        ))
+
+    sent = 0
+    failed = 0
+    message_ids = []
+    errors = []
+    api_instance = get_transactional_api()
+    for start in range(0, len(versions), BREVO_MAX_MESSAGE_VERSIONS):
+        batch = versions[start:start + BREVO_MAX_MESSAGE_VERSIONS]
+        send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
+            sender=sender,
+            subject=subject,
+            html_content=html_content,
+            message_versions=batch
+        )
+        try:
+            api_response = api_instance.send_transac_email(send_smtp_email, _request_timeout=_request_timeout())
+            sent += len(batch)
+            message_ids.extend(api_response.message_ids or [api_response.message_id])
+        except ApiException as e:
+            failed += len(batch)
+            errors.append(f'Brevo API error: {str(e)}')
+        except Exception as e:
+            failed += len(batch)
+            errors.append(f'Error sending email: {str(e)}')
+
+    return {
+        'success': failed == 0,
+        'message': '; '.join(errors) if errors else f'Sent {sent} emails in bulk.',
+        'sent': sent,
+        'failed': failed,
+        'message_ids': message_ids,
+    }
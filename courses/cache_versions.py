@@ -0,0 +1,33 @@
+"""
+Version counters kept in the shared 'default' cache.
+
+Cache keys that embed a counter's current value go stale together when
+it is bumped; old entries are never deleted, they simply expire. The
+counter itself is stored without a timeout. If it is evicted anyway, it
+is recreated from the clock (in microseconds), so it never restarts at
+a value that old entries were cached under.
+"""
+import time
+
+from django.core.cache import caches
+
+
+def _initial_value():
+    return time.time_ns() // 1000
+
+
+def current_version(key):
+    shared = caches['default']
+    version = shared.get(key)
+    if version is None:
+        shared.add(key, _initial_value(), None)
+        version = shared.get(key)
+    return version
+
+
+def bump_version(key):
+    shared = caches['default']
+    try:
+        shared.incr(key)
+    except ValueError:
+        shared.set(key, _initial_value(), None)
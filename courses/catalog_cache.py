@@ -0,0 +1,102 @@
+"""
+Catalog response cache for /api/courses/ (list and detail).
+
+Serialized responses are cached in two tiers: the per-process 'local'
+cache and the 'default' cache shared by every process. Keys carry the
+catalog generation, a counter bumped (on commit) whenever a Course or
+CourseOffering is saved or deleted (see signals.py), so one bump retires
+every cached catalog page in both tiers at once.
+
+The cached payload is the same for everyone; per-user fields such as
+`user_has_paid` are filled in from the request's entitlements on the way
+out. When an entry is missing, only one process rebuilds it while the
+others wait briefly for its result (stampede protection). Entries are
+always built from the primary database: one built from a lagging replica
+would be stored under the new generation and served until it expires.
+
+Queryset.update() and changes to a teacher's username do not fire the
+signals; such changes show up when the entry expires
+(CATALOG_CACHE_TIMEOUT).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .cache_versions import bump_version, current_version
+from .db_router import primary_reads
+from .entitlements import get_entitlements
+
+GENERATION_KEY = 'catalog-generation'
+WAIT_INTERVAL = 0.05
+
+
+def catalog_generation():
+    return current_version(GENERATION_KEY)
+
+
+def bump_catalog_generation():
+    bump_version(GENERATION_KEY)
+
+
+def bump_catalog_generation_on_commit():
+    transaction.on_commit(bump_catalog_generation)
+
+
+def catalog_cache_key(request, kind):
+    # Host and query string are part of the payload (absolute photo URLs, next/previous links)
+    url = f'{request.scheme}://{request.get_host()}{request.get_full_path()}'
+    return f'catalog:{kind}:v{catalog_generation()}:{hashlib.sha1(url.encode()).hexdigest()}'
+
+
+def _build(build):
+    with primary_reads():
+        return build()
+
+
+def _build_once(key, build):
+    shared = caches['default']
+    lock_key = f'{key}:lock'
+    if shared.add(lock_key, 1, settings.CATALOG_CACHE_LOCK_TIMEOUT):
+        try:
+            payload = _build(build)
+            shared.set(key, payload, settings.CATALOG_CACHE_TIMEOUT)
+            return payload
+        finally:
+            shared.delete(lock_key)
+
+    # Another process is building this entry: wait for it instead of
+    # running the same queries concurrently.
+    deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        payload = shared.get(key)
+        if payload is not None:
+            return payload
+    return _build(build)
+
+
+def get_catalog_payload(request, kind, build):
+    """
+    Cached payload for this catalog request, calling build() to produce it
+    on a miss. Exceptions from build() (404, invalid cursor) are not cached.
+    """
+    key = catalog_cache_key(request, kind)
+    local = caches['local']
+    payload = local.get(key)
+    if payload is None:
+        payload = caches['default'].get(key)
+        if payload is None:
+            payload = _build_once(key, build)
+        local.set(key, payload, settings.CATALOG_LOCAL_CACHE_TIMEOUT)
+    return payload
+
+
+def merge_user_fields(request, courses):
+    """Fill in the per-user fields of serialized courses for request.user"""
+    entitlements = get_entitlements(request)
+    for course in courses:
+        course['user_has_paid'] = entitlements.has_paid_course(course['id'])
+    return courses
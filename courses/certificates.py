@@ -0,0 +1,58 @@
+"""
+Certificate PDFs
+Certificates are rendered with xhtml2pdf once, stored in Certificate.file and
+served from storage afterwards. A certificate is re-rendered only when the
+certificate template changes (tracked as a hash of its source).
+"""
+import hashlib
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
+from django.utils import timezone
+from xhtml2pdf import pisa
+
+CERTIFICATE_TEMPLATE = 'courses/certificate_pdf.html'
+
+
+class CertificateRenderError(Exception):
+    def __init__(self, html):
+        super().__init__('xhtml2pdf failed to render the certificate')
+        self.html = html
+
+
+@lru_cache(maxsize=None)
+def certificate_template_version():
+    """Short hash of the certificate template source, computed once per process"""
+    source = get_template(CERTIFICATE_TEMPLATE).template.source
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+
+
+def render_certificate_pdf(certificate):
+    html = get_template(CERTIFICATE_TEMPLATE).render({'certificate': certificate})
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=buffer)
+    if pisa_status.err:
+        raise CertificateRenderError(html)
+    return buffer.getvalue()
+
+
+def certificate_is_current(certificate):
+    return bool(certificate.file) and certificate.template_version == certificate_template_version()
+
+
+def ensure_certificate_file(certificate):
+    """Render and store the PDF unless an up-to-date one is already stored"""
+    if certificate_is_current(certificate):
+        return certificate
+    pdf = render_certificate_pdf(certificate)
+    certificate.file.save(f'certificate_{certificate.certificate_id}.pdf', ContentFile(pdf), save=False)
+    certificate.template_version = certificate_template_version()
+    certificate.rendered_at = timezone.now()
+    certificate.save(update_fields=['file', 'template_version', 'rendered_at'])
+    return certificate
+
+
+def certificate_etag(certificate):
+    return f'"{certificate.certificate_id}-{certificate.template_version}"'
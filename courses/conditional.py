@@ -0,0 +1,50 @@
+"""
+Conditional GET (ETag / 304) for the catalog and offering APIs.
+
+Validators come from cheap aggregates over every table a payload is built
+from: (row count, latest updated_at) per table. The count catches deletes,
+which leave no timestamp behind. Per-user and per-representation inputs
+(user, renderer, paid courses) are mixed into the ETag, so a client whose
+If-None-Match still matches gets a 304 before anything is queried for the
+payload or serialized.
+
+Last-Modified is sent for information only and If-Modified-Since alone
+never produces a 304. A deleted row or a new payment changes the ETag but
+not the latest timestamp.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def table_state(queryset, latest='updated_at'):
+    """(row count, latest value of `latest`) of a queryset, in one query"""
+    state = queryset.order_by().aggregate(count=Count('pk'), latest=Max(latest))
+    return state['count'], state['latest']
+
+
+def conditional_response(request, get_states, build, extra=()):
+    """
+    Return 304 when the request's If-None-Match matches the validators of
+    get_states() + extra, otherwise build() the response and attach them.
+    """
+    try:
+        states = get_states()
+    except (TypeError, ValueError):
+        # Malformed lookup (e.g. a non-numeric pk): let the view answer 404
+        return build()
+
+    etag = quote_etag(hashlib.sha1(repr((states, tuple(extra))).encode()).hexdigest())
+    timestamps = [latest for _, latest in states if hasattr(latest, 'timestamp')]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
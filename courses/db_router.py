@@ -0,0 +1,112 @@
+"""
+Read-replica routing.
+
+Reads go to a replica (settings.DATABASE_REPLICAS) only while handling a
+GET/HEAD/OPTIONS request for a view marked as replica-safe: DRF ViewSets
+with `read_replica = True` and function views decorated with
+@read_replica. Everything else, and every write, uses 'default'.
+
+Replicas lag behind the primary, so a request that writes sets a short
+lived cookie (READ_REPLICA_STICKY_SECONDS); while it is present the same
+browser reads from the primary and sees its own changes. Sessions and
+entitlements (entitlements.py) are always read from the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_ONLY_APPS = ('sessions',)
+
+
+class RequestRouting:
+    def __init__(self):
+        self.replica = None  # replica alias for this request's reads, if any
+        self.wrote = False
+
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+def read_replica(view_func):
+    """Mark a function view as safe to serve its GET reads from a replica"""
+    view_func.read_replica = True
+    return view_func
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, also in a replica-routed request"""
+    routing = _routing.get()
+    if routing is None:
+        yield
+        return
+    replica, routing.replica = routing.replica, None
+    try:
+        yield
+    finally:
+        routing.replica = replica
+
+
+def is_replica_view(view_func):
+    view_class = getattr(view_func, 'cls', None)  # DRF ViewSets and APIViews
+    return bool(getattr(view_func, 'read_replica', False) or getattr(view_class, 'read_replica', False))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.replica is None or routing.wrote:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.READ_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        if (
+            routing is not None
+            and settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and is_replica_view(view_func)
+        ):
+            routing.replica = random.choice(settings.DATABASE_REPLICAS)
+        return None
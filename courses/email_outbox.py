@@ -0,0 +1,131 @@
+"""
+Email Outbox
+Request handlers only enqueue emails here; the `process_email_outbox` management
+command drains the table in the background, sending through the configured
+transport with concurrency, retries and exponential backoff. Messages with an
+`expires_at` (one-time codes) are expired instead of being sent or retried
+after that time.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import EmailOutbox
+
+
+def enqueue_email(to_email, subject, html_content, sender_name="Learning Platform", expires_at=None):
+    """
+    Queue an email for the background worker. Same arguments as send_brevo_email,
+    plus `expires_at`: the time after which the email is useless and is dropped.
+
+    Returns:
+        EmailOutbox: the queued row
+    """
+    return EmailOutbox.objects.create(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        sender_name=sender_name,
+        expires_at=expires_at,
+    )
+
+
+class BrevoTransport:
+    """Sends through the Brevo Transactional Email API"""
+
+    def send(self, message):
+        from .brevo_email import send_brevo_email
+        return send_brevo_email(
+            to_email=message.to_email,
+            subject=message.subject,
+            html_content=message.html_content,
+            sender_name=message.sender_name,
+        )
+
+
+class FakeTransport:
+    """Offline transport: records messages in memory instead of sending them"""
+
+    sent = []
+
+    def send(self, message):
+        FakeTransport.sent.append({
+            'to_email': message.to_email,
+            'subject': message.subject,
+            'html_content': message.html_content,
+            'sender_name': message.sender_name,
+        })
+        return {'success': True, 'message': f'Recorded by fake transport (#{message.pk})'}
+
+
+def get_transport():
+    return import_string(settings.EMAIL_OUTBOX_TRANSPORT)()
+
+
+def claim_batch(batch_size, lease_seconds=None):
+    """
+    Lock up to `batch_size` due messages and lease them to this worker.
+
+    Rows stuck in 'sending' after their lease expired (a worker died mid-send)
+    are picked up again. SKIP LOCKED lets several workers drain concurrently.
+    Due rows past their expires_at are marked 'expired' instead.
+    """
+    lease_seconds = lease_seconds or settings.EMAIL_OUTBOX_LEASE_SECONDS
+    now = timezone.now()
+    with transaction.atomic():
+        due = EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pending') | Q(status='sending'), next_attempt_at__lte=now
+        )
+        expired = list(due.filter(expires_at__lte=now).values_list('pk', flat=True))
+        if expired:
+            EmailOutbox.objects.filter(pk__in=expired).update(status='expired', last_error='Expired before it could be sent')
+        messages = list(
+            due.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if messages:
+            EmailOutbox.objects.filter(pk__in=[m.pk for m in messages]).update(
+                status='sending',
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+    return messages
+
+
+def send_message(transport, message):
+    """Run one transport call, never raising. Returns (success, detail)."""
+    try:
+        result = transport.send(message)
+    except Exception as e:
+        return False, f'Error sending email: {e}'
+    return result['success'], result['message']
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter, capped at EMAIL_OUTBOX_MAX_BACKOFF_SECONDS"""
+    delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1))
+    delay = min(delay, settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def record_result(message, success, detail, max_attempts=None):
+    """Persist the outcome of a send: sent, scheduled for retry, or failed/expired for good"""
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    now = timezone.now()
+    attempts = message.attempts + 1
+    if success:
+        updates = {'status': 'sent', 'sent_at': now, 'last_error': ''}
+    elif attempts >= max_attempts:
+        updates = {'status': 'failed', 'last_error': detail}
+    else:
+        next_attempt_at = now + timedelta(seconds=backoff_delay(attempts))
+        if message.expires_at and next_attempt_at >= message.expires_at:
+            updates = {'status': 'expired', 'last_error': detail}
+        else:
+            updates = {'status': 'pending', 'last_error': detail, 'next_attempt_at': next_attempt_at}
+    EmailOutbox.objects.filter(pk=message.pk).update(attempts=attempts, **updates)
+    return updates['status']
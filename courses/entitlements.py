@@ -0,0 +1,109 @@
+"""
+Entitlement service: which courses and offerings a user can access.
+
+A user's successful payments and enrollments are loaded once (two small
+queries) into sets, memoized on the request and, when ENTITLEMENTS_CACHE
+names a cache shared by every worker (Redis), cached across requests per
+user. Saving or deleting a Payment or Enrollment drops the user's cached
+entry (see signals.py), so access checks are set lookups. A per-process
+cache is never used across requests: the worker that handled a payment
+would be the only one to drop its entry.
+
+They are always loaded from the primary database, also in views served
+from a read replica: a replica that has not caught up with a new payment
+would otherwise put stale access into the cache for the full timeout.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Enrollment, Payment
+
+REQUEST_ATTR = '_entitlements'
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    paid_course_ids: frozenset = frozenset()
+    paid_offering_ids: frozenset = frozenset()
+    enrolled_offering_ids: frozenset = frozenset()
+    enrolled_course_ids: frozenset = frozenset()
+
+    def has_paid_course(self, course_id):
+        return course_id in self.paid_course_ids
+
+    def has_paid_offering(self, offering_id):
+        return offering_id in self.paid_offering_ids
+
+    def is_enrolled_in_course(self, course_id):
+        return course_id in self.enrolled_course_ids
+
+    def is_enrolled_in_offering(self, offering_id):
+        return offering_id in self.enrolled_offering_ids
+
+    def can_access_course(self, course_id):
+        return self.has_paid_course(course_id) or self.is_enrolled_in_course(course_id)
+
+    @property
+    def accessible_course_ids(self):
+        return self.paid_course_ids | self.enrolled_course_ids
+
+
+NO_ENTITLEMENTS = Entitlements()
+
+
+def entitlements_cache_key(user_id):
+    return f'entitlements:{user_id}'
+
+
+def _shared_cache():
+    alias = settings.ENTITLEMENTS_CACHE
+    return caches[alias] if alias else None
+
+
+def load_entitlements(user_id):
+    paid_course_ids = set()
+    paid_offering_ids = set()
+    for course_id, offering_id in Payment.objects.using('default').filter(student_id=user_id, status='success').values_list('course_id', 'course_offering_id'):
+        if course_id:
+            paid_course_ids.add(course_id)
+        if offering_id:
+            paid_offering_ids.add(offering_id)
+
+    enrolled = Enrollment.objects.using('default').filter(student_id=user_id).values_list('course_offering_id', 'course_offering__course_id')
+    enrolled_offering_ids = set()
+    enrolled_course_ids = set()
+    for offering_id, course_id in enrolled:
+        enrolled_offering_ids.add(offering_id)
+        enrolled_course_ids.add(course_id)
+
+    return Entitlements(
+        paid_course_ids=frozenset(paid_course_ids),
+        paid_offering_ids=frozenset(paid_offering_ids),
+        enrolled_offering_ids=frozenset(enrolled_offering_ids),
+        enrolled_course_ids=frozenset(enrolled_course_ids),
+    )
+
+
+def get_entitlements(request):
+    """Entitlements of request.user, memoized on the request and cached per user when a shared cache is configured"""
+    if not request.user.is_authenticated:
+        return NO_ENTITLEMENTS
+    entitlements = getattr(request, REQUEST_ATTR, None)
+    if entitlements is None:
+        shared = _shared_cache()
+        key = entitlements_cache_key(request.user.pk)
+        entitlements = shared.get(key) if shared else None
+        if entitlements is None:
+            entitlements = load_entitlements(request.user.pk)
+            if shared:
+                shared.set(key, entitlements, settings.ENTITLEMENTS_CACHE_TIMEOUT)
+        setattr(request, REQUEST_ATTR, entitlements)
+    return entitlements
+
+
+def invalidate_entitlements(user_id):
+    shared = _shared_cache()
+    if shared:
+        shared.delete(entitlements_cache_key(user_id))
@@ -0,0 +1,95 @@
+"""
+Quiz grading engine.
+
+Each quiz has a compact answer key (question -> valid and correct choice ids)
+built with a single query and cached per quiz version (see quiz_cache.py), so
+it is rebuilt after one of the quiz's questions or choices changes. Grading a
+submission is then pure Python with no per-question queries.
+"""
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+
+from .models import Question
+from .quiz_cache import QUIZ_CACHE_TIMEOUT, quiz_cache_key
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    question_ids: tuple
+    valid_choices: dict   # question_id -> frozenset of choice ids belonging to it
+    correct_choices: dict  # question_id -> frozenset of correct choice ids
+
+
+@dataclass
+class GradeResult:
+    total_questions: int
+    correct_answers: int
+    score: float
+    passed: bool
+    # question_id -> selected choice id (None when unanswered or invalid)
+    selections: dict = field(default_factory=dict)
+    correct_question_ids: frozenset = frozenset()
+
+
+def build_answer_key(quiz_id):
+    valid = {}
+    correct = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by('order', 'id').values_list(
+        'id', 'choices__id', 'choices__is_correct'
+    )
+    for question_id, choice_id, is_correct in rows:
+        valid.setdefault(question_id, set())
+        correct.setdefault(question_id, set())
+        if choice_id is not None:
+            valid[question_id].add(choice_id)
+            if is_correct:
+                correct[question_id].add(choice_id)
+    return AnswerKey(
+        question_ids=tuple(valid),
+        valid_choices={qid: frozenset(ids) for qid, ids in valid.items()},
+        correct_choices={qid: frozenset(ids) for qid, ids in correct.items()},
+    )
+
+
+def get_answer_key(quiz_id):
+    cache_key = quiz_cache_key('quiz-answer-key', quiz_id)
+    key = cache.get(cache_key)
+    if key is None:
+        key = build_answer_key(quiz_id)
+        cache.set(cache_key, key, QUIZ_CACHE_TIMEOUT)
+    return key
+
+
+def grade_submission(quiz, data):
+    """
+    Grade submitted answers (`question_<id>` -> choice id, e.g. request.POST).
+
+    A choice only counts if it belongs to the question it was submitted for.
+    """
+    key = get_answer_key(quiz.id)
+    selections = {}
+    correct_question_ids = set()
+    for question_id in key.question_ids:
+        selected = data.get(f'question_{question_id}')
+        try:
+            selected = int(selected)
+        except (TypeError, ValueError):
+            selected = None
+        if selected not in key.valid_choices[question_id]:
+            selected = None
+        elif selected in key.correct_choices[question_id]:
+            correct_question_ids.add(question_id)
+        selections[question_id] = selected
+
+    total_questions = len(key.question_ids)
+    correct_answers = len(correct_question_ids)
+    score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
+    return GradeResult(
+        total_questions=total_questions,
+        correct_answers=correct_answers,
+        score=score,
+        passed=score >= quiz.pass_percentage,
+        selections=selections,
+        correct_question_ids=frozenset(correct_question_ids),
+    )
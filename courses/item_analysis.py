@@ -0,0 +1,106 @@
+"""
+Quiz item analysis.
+
+Computes, per question, over every attempt that stored per-answer rows:
+
+* difficulty: proportion of attempts that answered correctly (p-value)
+* discrimination: p(upper 27% of total scores) - p(lower 27%)
+* distractor frequencies: how often each choice (or nothing) was picked
+
+All answers are streamed from the database straight into NumPy arrays and
+the statistics are computed with vectorized operations, so tens of
+thousands of attempts take seconds.
+"""
+import numpy as np
+
+from .models import Choice, Question, QuizAnswer
+
+GROUP_FRACTION = 0.27
+
+
+def _load_answers(quiz_id):
+    # One query, so the array is a consistent snapshot: a separate count()
+    # could disagree with the rows when answers change in between.
+    rows = QuizAnswer.objects.filter(attempt__quiz_id=quiz_id).values_list(
+        'attempt_id', 'question_id', 'choice_id', 'is_correct'
+    )
+    return np.fromiter(
+        ((a, q, -1 if c is None else c, correct) for a, q, c, correct in rows.iterator(chunk_size=20000)),
+        dtype=[('attempt', np.int64), ('question', np.int64), ('choice', np.int64), ('correct', np.bool_)],
+    )
+
+
+def item_analysis(quiz_id):
+    """
+    Returns:
+        dict: {'attempts': int, 'questions': [{'id', 'text', 'difficulty',
+        'discrimination', 'unanswered', 'choices': [{'id', 'text',
+        'is_correct', 'count', 'proportion'}]}]}
+    """
+    questions = list(Question.objects.filter(quiz_id=quiz_id).order_by('order', 'id').values('id', 'text'))
+    choices = list(Choice.objects.filter(question__quiz_id=quiz_id).order_by('id').values('id', 'question_id', 'text', 'is_correct'))
+    answers = _load_answers(quiz_id)
+
+    attempt_ids, attempt_idx = np.unique(answers['attempt'], return_inverse=True)
+    n_attempts = len(attempt_ids)
+    question_ids = np.array([q['id'] for q in questions], dtype=np.int64)
+    report = {'attempts': n_attempts, 'questions': []}
+    if not len(question_ids):
+        return report
+
+    # Map question ids to matrix columns; answers to questions deleted since
+    # the attempt was made are ignored.
+    sorter = np.argsort(question_ids)
+    sorted_ids = question_ids[sorter]
+    position = np.clip(np.searchsorted(sorted_ids, answers['question']), 0, len(sorted_ids) - 1)
+    known = sorted_ids[position] == answers['question']
+    column = sorter[position[known]]
+    row = attempt_idx[known]
+
+    # attempts x questions matrix of correct answers
+    correct = np.zeros((n_attempts, len(question_ids)), dtype=np.float64)
+    answered = np.zeros((n_attempts, len(question_ids)), dtype=bool)
+    correct[row, column] = answers['correct'][known]
+    answered[row, column] = True
+
+    taken = answered.sum(axis=0)
+    difficulty = np.divide(correct.sum(axis=0), taken, out=np.full(len(question_ids), np.nan), where=taken > 0)
+
+    discrimination = np.full(len(question_ids), np.nan)
+    group_size = int(np.floor(n_attempts * GROUP_FRACTION))
+    if group_size > 0:
+        ranking = np.argsort(correct.sum(axis=1), kind='stable')
+        lower = correct[ranking[:group_size]].mean(axis=0)
+        upper = correct[ranking[-group_size:]].mean(axis=0)
+        discrimination = upper - lower
+
+    # Distractor frequencies: count (question column, choice id) pairs
+    frequency = {}
+    if column.size:
+        pairs, counts = np.unique(np.stack([column, answers['choice'][known]]), axis=1, return_counts=True)
+        frequency = {(int(c), int(ch)): int(n) for (c, ch), n in zip(pairs.T, counts)}
+
+    choices_by_question = {}
+    for choice in choices:
+        choices_by_question.setdefault(choice['question_id'], []).append(choice)
+
+    for col, question in enumerate(questions):
+        total = int(taken[col])
+        report['questions'].append({
+            'id': question['id'],
+            'text': question['text'],
+            'difficulty': None if np.isnan(difficulty[col]) else round(float(difficulty[col]), 3),
+            'discrimination': None if np.isnan(discrimination[col]) else round(float(discrimination[col]), 3),
+            'unanswered': frequency.get((col, -1), 0),
+            'choices': [
+                {
+                    'id': choice['id'],
+                    'text': choice['text'],
+                    'is_correct': choice['is_correct'],
+                    'count': frequency.get((col, choice['id']), 0),
+                    'proportion': round(frequency.get((col, choice['id']), 0) / total, 3) if total else None,
+                }
+                for choice in choices_by_question.get(question['id'], [])
+            ],
+        })
+    return report
@@ -0,0 +1,333 @@
+import json
+import math
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from courses import urls as course_urls
+from courses.certificates import certificate_is_current
+from courses.models import Certificate, Choice, CourseOffering, CustomUser, Enrollment, Payment, StudentQuizAttempt
+
+DEFAULT_BUDGETS = Path(settings.BASE_DIR) / 'courses' / 'endpoint_budgets.json'
+
+# Who requests each endpoint; anything not listed is requested as the sample student.
+ENDPOINT_USERS = {
+    'login': None,
+    'register': None,
+    'verify_otp': None,
+    'api-root': None,
+    'admin_dashboard': 'admin',
+    'teacher_dashboard': 'teacher',
+    'add_quiz': 'teacher',
+    'manage_quiz': 'teacher',
+    'quiz_item_analysis': 'teacher',
+    'delete_quiz': 'teacher',
+    'add_question': 'teacher',
+    'add_choice': 'teacher',
+    'delete_question': 'teacher',
+    'delete_choice': 'teacher',
+    'download_certificate': 'certificate_owner',
+    'customuser-list': 'admin',
+    'customuser-detail': 'admin',
+    'courseoffering-list': 'teacher',
+    'courseoffering-detail': 'teacher',
+}
+
+# URL kwargs that need a different sample than the default one, e.g. the
+# payment pages only render for a course the student has not paid for yet.
+ENDPOINT_KWARGS = {
+    'course_payment_page': {'course_id': 'unpaid_course_id'},
+    'payment_page': {'offering_id': 'unpaid_offering_id'},
+}
+
+# Endpoints that only do real work on POST, with the form data to send.
+ENDPOINT_POSTS = {
+    'logout': lambda samples: {},
+    'submit_quiz': lambda samples: {f'question_{q}': c for q, c in samples['answers']},
+}
+
+
+def discover_endpoints():
+    """Named URLs of courses/urls.py and the API router, in declaration order"""
+    from core_project.urls import router
+
+    endpoints = {}
+    for pattern in list(course_urls.urlpatterns) + list(router.urls):
+        if not pattern.name or pattern.name in endpoints:
+            continue
+        params = getattr(pattern.pattern, 'converters', None) or pattern.pattern.regex.groupindex
+        endpoints[pattern.name] = [param for param in params if param != 'format']
+    return endpoints
+
+
+def find_samples():
+    """
+    One consistent set of objects to request: a student enrolled in an offering
+    whose quiz they attempted, plus that offering's teacher, quiz, question,
+    choice and the student's payment. Returns None when the database is empty.
+
+    Passed attempts are preferred: quiz_result does more work for them
+    (certificate lookup), so the budget does not depend on which attempt
+    the seeded data happens to put first.
+    """
+    enrolled = Enrollment.objects.filter(student_id=OuterRef('student_id'), course_offering_id=OuterRef('quiz__course_offering_id'))
+    with_choices = Choice.objects.filter(question__quiz_id=OuterRef('quiz_id'))
+    attempt = (
+        StudentQuizAttempt.objects
+        .filter(Exists(enrolled), Exists(with_choices))
+        .select_related('student', 'quiz__course_offering__course', 'quiz__course_offering__teacher')
+        .order_by('-passed', 'pk')
+        .first()
+    )
+    if attempt is None:
+        return None
+
+    quiz = attempt.quiz
+    offering = quiz.course_offering
+    question = quiz.questions.filter(choices__isnull=False).order_by('pk').first()
+    choice = question.choices.order_by('pk').first()
+    enrollment = Enrollment.objects.filter(student=attempt.student, course_offering=offering).first()
+    payment = Payment.objects.filter(student=attempt.student).order_by('pk').first()
+    certificate = next(
+        (c for c in Certificate.objects.select_related('student').order_by('pk')[:50] if certificate_is_current(c)),
+        None
+    )
+    unpaid = (
+        CourseOffering.objects
+        .exclude(course__payments__student=attempt.student)
+        .exclude(offering_enrollment_set__student=attempt.student)
+        .order_by('pk')
+        .values_list('id', 'course_id')
+        .first()
+    ) or (None, None)
+    admin = CustomUser.objects.filter(role='admin').order_by('pk').first()
+    if admin is None:
+        # Rolled back with everything else at the end of the run
+        admin = CustomUser.objects.create_user('budget_admin', 'budget_admin@example.com', None, role='admin')
+
+    answers = [(q_id, c_id) for q_id, c_id in Choice.objects.filter(question__quiz=quiz, is_correct=True).values_list('question_id', 'id')]
+    return {
+        'users': {
+            'student': attempt.student,
+            'teacher': offering.teacher,
+            'admin': admin,
+            'certificate_owner': certificate.student if certificate else None,
+        },
+        'kwargs': {
+            'course_id': offering.course_id,
+            'offering_id': offering.id,
+            'quiz_id': quiz.id,
+            'question_id': question.id,
+            'choice_id': choice.id,
+            'attempt_id': attempt.id,
+            'transaction_id': payment.transaction_id if payment else None,
+            'certificate_id': certificate.certificate_id if certificate else None,
+            'unpaid_offering_id': unpaid[0],
+            'unpaid_course_id': unpaid[1],
+        },
+        'pks': {
+            'customuser': attempt.student_id,
+            'course': offering.course_id,
+            'courseoffering': offering.id,
+            'enrollment': enrollment.id if enrollment else None,
+            'payment': payment.id if payment else None,
+        },
+        'answers': answers,
+    }
+
+
+def build_request(name, params, samples):
+    """(url, user, post data) for an endpoint, or a reason string when it cannot be requested"""
+    kwargs = {}
+    for param in params:
+        sample = ENDPOINT_KWARGS.get(name, {}).get(param, param)
+        value = samples['pks'].get(name.rsplit('-', 1)[0]) if param == 'pk' else samples['kwargs'].get(sample)
+        if value is None:
+            return f'no sample for {sample}'
+        kwargs[param] = value
+
+    role = ENDPOINT_USERS.get(name, 'student')
+    user = samples['users'][role] if role else None
+    if role and user is None:
+        return f'no sample {role}'
+
+    url = reverse(name, kwargs=kwargs)
+    if name.endswith('-list'):
+        url += '?page_size=50'
+    data = ENDPOINT_POSTS[name](samples) if name in ENDPOINT_POSTS else None
+    return url, user, data
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts queries and sums their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def measure(client, url, user, data):
+    """Requests the url once inside a rolled back savepoint and returns the numbers"""
+    for cache in caches.all():
+        cache.clear()
+    with transaction.atomic():
+        client.logout()
+        if user is not None:
+            client.force_login(user)
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            if data is None:
+                response = client.get(url, HTTP_ACCEPT='application/json,text/html')
+            else:
+                response = client.post(url, data)
+            wall = time.perf_counter() - started
+        transaction.set_rollback(True)
+    return {
+        'status': response.status_code,
+        'queries': timer.count,
+        'db_ms': timer.seconds * 1000,
+        'wall_ms': wall * 1000,
+    }
+
+
+def headroom(value, factor=2, floor=20):
+    """Time budget written by --update: twice the measurement, rounded up to 10 ms"""
+    return max(floor, int(math.ceil(value * factor / 10.0)) * 10)
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every URL of courses/urls.py and every API router endpoint with the test client '
+        'against the current (seeded) database, and fail when one goes over the query, DB time or '
+        'wall time budget in courses/endpoint_budgets.json. Nothing is written: every request is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budgets', default=str(DEFAULT_BUDGETS), help='Budget file to check against')
+        parser.add_argument('--update', action='store_true', help='Write the measurements to the budget file instead of checking')
+        parser.add_argument('--repeat', type=int, default=3, help='Requests per endpoint; times are the median')
+        parser.add_argument('--time-factor', type=float, default=1.0, help='Multiply the time budgets, for slower machines')
+        parser.add_argument('--queries-only', action='store_true', help='Only check query counts and status codes')
+        parser.add_argument('--only', nargs='*', help='Endpoint names to check')
+
+    def handle(self, *args, **options):
+        path = Path(options['budgets'])
+        budgets = json.loads(path.read_text()) if path.exists() else {
+            'dataset': 'manage.py seed_scale --answers',
+            'endpoints': {},
+        }
+        endpoints = discover_endpoints()
+        if options['only']:
+            endpoints = {name: params for name, params in endpoints.items() if name in options['only']}
+
+        # Private caches so cold paths are measured and no shared cache is touched.
+        local_caches = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'endpoint-budgets-{alias}'}
+            for alias in settings.CACHES
+        }
+        # Reads stay on the primary: the samples only exist in this run's transaction.
+        with override_settings(
+            CACHES=local_caches,
+            ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'],
+            DATABASE_REPLICAS=[],
+        ):
+            with transaction.atomic():
+                samples = find_samples()
+                if samples is None:
+                    raise CommandError('No quiz attempt of an enrolled student found. Seed the database first (manage.py seed_scale).')
+                results = self.run(endpoints, samples, options['repeat'])
+                transaction.set_rollback(True)
+
+        if options['update']:
+            self.write_budgets(path, budgets, results)
+        else:
+            self.check_budgets(budgets, results, options)
+
+    def run(self, endpoints, samples, repeat):
+        client = Client()
+        results = {}
+        for name, params in endpoints.items():
+            request = build_request(name, params, samples)
+            if isinstance(request, str):
+                results[name] = {'skipped': request}
+                continue
+            runs = [measure(client, *request) for _ in range(max(repeat, 1))]
+            results[name] = {
+                'status': runs[-1]['status'],
+                'queries': max(r['queries'] for r in runs),
+                'db_ms': statistics.median(r['db_ms'] for r in runs),
+                'wall_ms': statistics.median(r['wall_ms'] for r in runs),
+            }
+        return results
+
+    def check_budgets(self, budgets, results, options):
+        failures = []
+        factor = options['time_factor']
+        self.stdout.write(f"{'endpoint':32} {'status':>6} {'queries':>11} {'db ms':>15} {'wall ms':>15}")
+        for name, result in results.items():
+            if 'skipped' in result:
+                self.stdout.write(self.style.WARNING(f"{name:32} skipped: {result['skipped']}"))
+                continue
+            budget = budgets['endpoints'].get(name)
+            if budget is None:
+                failures.append(f'{name}: no budget (run with --update and commit the file)')
+                continue
+
+            problems = []
+            if result['status'] != budget['status']:
+                problems.append(f"status {result['status']} != {budget['status']}")
+            if result['queries'] > budget['queries']:
+                problems.append(f"{result['queries']} queries > {budget['queries']}")
+            if not options['queries_only']:
+                for key in ('db_ms', 'wall_ms'):
+                    if result[key] > budget[key] * factor:
+                        problems.append(f"{key} {result[key]:.0f} > {budget[key] * factor:.0f}")
+
+            line = (
+                f"{name:32} {result['status']:>6} {result['queries']:>5}/{budget['queries']:<5} "
+                f"{result['db_ms']:>7.1f}/{budget['db_ms'] * factor:<7.0f} {result['wall_ms']:>7.1f}/{budget['wall_ms'] * factor:<7.0f}"
+            )
+            if problems:
+                failures.append(f"{name}: {'; '.join(problems)}")
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(f'FAIL {failure}'))
+            raise CommandError(f'{len(failures)} endpoint(s) over budget.')
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
+
+    def write_budgets(self, path, budgets, results):
+        endpoints = budgets.setdefault('endpoints', {})
+        for name, result in results.items():
+            if 'skipped' in result:
+                self.stdout.write(self.style.WARNING(f"{name}: skipped ({result['skipped']}), budget left unchanged"))
+                continue
+            endpoints[name] = {
+                'status': result['status'],
+                'queries': result['queries'],
+                'db_ms': headroom(result['db_ms']),
+                'wall_ms': headroom(result['wall_ms'], floor=50),
+            }
+        path.write_text(json.dumps(budgets, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(endpoints)} budgets to {path}'))
@@ -0,0 +1,97 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from courses.models import Certificate, Enrollment, Payment, StudentQuizAttempt
+
+# Hot lookups and the table each one must reach through an index.
+# Sample ids are taken from the data when present; the plans do not depend on them.
+HOT_QUERIES = [
+    (
+        'payment: student + course + success',
+        'courses_payment',
+        lambda ids: Payment.objects.filter(student_id=ids['student'], course_id=ids['course'], status='success'),
+    ),
+    (
+        'payment: successful payments of a student (entitlements)',
+        'courses_payment',
+        lambda ids: Payment.objects.filter(student_id=ids['student'], status='success').values_list('course_id', 'course_offering_id'),
+    ),
+    (
+        'enrollment: student + course',
+        'courses_enrollment',
+        lambda ids: Enrollment.objects.filter(student_id=ids['student'], course_offering__course_id=ids['course']),
+    ),
+    (
+        'attempt: latest attempt of a student for a quiz',
+        'courses_studentquizattempt',
+        lambda ids: StudentQuizAttempt.objects.filter(student_id=ids['student'], quiz_id=ids['quiz']).order_by('-completed_at')[:1],
+    ),
+    (
+        'certificate: student + offering',
+        'courses_certificate',
+        lambda ids: Certificate.objects.filter(student_id=ids['student'], course_offering_id=ids['offering']),
+    ),
+]
+
+
+def sample_ids():
+    attempt = StudentQuizAttempt.objects.select_related('quiz').order_by('pk').first()
+    payment = Payment.objects.order_by('pk').first()
+    enrollment = Enrollment.objects.select_related('course_offering').order_by('pk').first()
+    return {
+        'student': payment.student_id if payment else 1,
+        'course': payment.course_id if payment and payment.course_id else 1,
+        'quiz': attempt.quiz_id if attempt else 1,
+        'offering': enrollment.course_offering_id if enrollment else 1,
+    }
+
+
+def full_scan_lines(plan, table):
+    """Plan lines that read the whole table instead of seeking through an index"""
+    if connection.vendor == 'postgresql':
+        pattern = re.compile(rf'Seq Scan on {table}\b')
+    else:
+        # SQLite: "SCAN table" (optionally "USING ... INDEX") walks every row,
+        # "SEARCH table USING INDEX" seeks.
+        pattern = re.compile(rf'\bSCAN {table}\b')
+    return [line.strip() for line in plan.splitlines() if pattern.search(line)]
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot lookups and fail if any of them plans a full table scan. '
+        'Run it against a seeded database (PostgreSQL only picks indexes once tables are big enough).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-seqscan', action='store_true',
+            help='PostgreSQL: disable sequential scans so small databases still show whether a usable index exists'
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **options):
+        ids = sample_ids()
+        failures = []
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+                if options['no_seqscan']:
+                    cursor.execute('SET enable_seqscan = off')
+
+        for name, table, build in HOT_QUERIES:
+            plan = build(ids).explain()
+            scans = full_scan_lines(plan, table)
+            if options['verbose_plans']:
+                self.stdout.write(f'--- {name}\n{plan}')
+            if scans:
+                failures.append(name)
+                self.stderr.write(self.style.ERROR(f'FAIL {name}: ' + '; '.join(scans)))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok   {name}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot quer{"y" if len(failures) == 1 else "ies"} regressed to a full table scan.')
@@ -0,0 +1,101 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from courses.certificates import CertificateRenderError, certificate_template_version, ensure_certificate_file
+from courses.models import Certificate
+
+
+def _init_worker():
+    django.setup()
+    # A forked worker must not use the parent's database connections, nor
+    # close them: closing would end the parent's session on the shared
+    # socket. Drop them so the worker opens its own.
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+
+def _render_certificate(certificate_pk):
+    """Runs in a worker process. Returns (pk, error or None)."""
+    try:
+        certificate = Certificate.objects.select_related('student', 'course_offering__course').get(pk=certificate_pk)
+        ensure_certificate_file(certificate)
+        return certificate_pk, None
+    except Certificate.DoesNotExist:
+        return certificate_pk, None
+    except CertificateRenderError as e:
+        return certificate_pk, str(e)
+    except Exception as e:
+        return certificate_pk, f'{type(e).__name__}: {e}'
+
+
+def stale_certificates(offering_id=None):
+    """Certificates with no stored PDF, or one rendered from an older template"""
+    queryset = Certificate.objects.filter(
+        Q(file__isnull=True) | Q(file='') | ~Q(template_version=certificate_template_version())
+    )
+    if offering_id:
+        queryset = queryset.filter(course_offering_id=offering_id)
+    return queryset
+
+
+class Command(BaseCommand):
+    help = 'Render and store PDFs for certificates that do not have an up-to-date file yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of render processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Certificates queued per round')
+        parser.add_argument('--offering', type=int, help='Only certificates of this course offering')
+        parser.add_argument('--limit', type=int, help='Stop after this many certificates')
+
+    def handle(self, *args, **options):
+        queryset = stale_certificates(options['offering'])
+        total = queryset.count()
+        if options['limit']:
+            total = min(total, options['limit'])
+        if not total:
+            self.stdout.write(self.style.SUCCESS('All certificates are already rendered.'))
+            return
+
+        self.stdout.write(f"Rendering {total} certificates with {options['workers']} workers...")
+        # Every certificate is saved as soon as it is rendered, so an
+        # interrupted run simply continues with what is still stale.
+        done = failed = 0
+        last_pk = 0
+        started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            while done + failed < total:
+                batch_size = min(options['batch_size'], total - done - failed)
+                pks = list(
+                    queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                last_pk = pks[-1]
+
+                # Workers are forked on submit (all of them on the first one,
+                # a replacement when one dies): leave no connection to inherit.
+                connections.close_all()
+                futures = [pool.submit(_render_certificate, pk) for pk in pks]
+                for future in as_completed(futures):
+                    pk, error = future.result()
+                    if error:
+                        failed += 1
+                        self.stderr.write(f'Certificate #{pk} failed: {error}')
+                    else:
+                        done += 1
+
+                elapsed = time.monotonic() - started
+                rate = (done + failed) / elapsed if elapsed else 0
+                self.stdout.write(f'{done + failed}/{total} processed ({failed} failed), {rate:.1f} certificates/s')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done} certificates in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f}/s), {failed} failed.'
+        ))
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from courses.email_outbox import claim_batch, get_transport, record_result, send_message
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of parallel sends')
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages claimed per round')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        transport = get_transport()
+        concurrency = options['concurrency']
+        totals = {'sent': 0, 'pending': 0, 'failed': 0, 'expired': 0}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                messages = claim_batch(options['batch_size'])
+                if not messages:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                # Only the network calls run in the pool; results are written
+                # back from this thread so workers never touch the database.
+                results = pool.map(lambda m: send_message(transport, m), messages)
+                for message, (success, detail) in zip(messages, results):
+                    status = record_result(message, success, detail)
+                    totals[status] += 1
+                    if status != 'sent':
+                        self.stderr.write(f'#{message.pk} to {message.to_email}: {detail} ({status})')
+
+                self.stdout.write(
+                    f"Processed {len(messages)} emails "
+                    f"(sent {totals['sent']}, retrying {totals['pending']}, failed {totals['failed']}, "
+                    f"expired {totals['expired']})"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: sent {totals['sent']}, retrying {totals['pending']}, failed {totals['failed']}, "
+            f"expired {totals['expired']}"
+        ))
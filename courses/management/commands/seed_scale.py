@@ -0,0 +1,360 @@
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from courses.models import (
+    Choice, Course, CourseContent, CourseOffering, CustomUser, Enrollment, Payment,
+    Question, Quiz, QuizAnswer, StudentQuizAttempt,
+)
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+@contextmanager
+def _generated_timestamps(model, names):
+    """
+    Let bulk_create keep the given auto_now / auto_now_add values: its
+    pre_save would replace them all with now(), unlike COPY.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.name in names and (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False))
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TableWriter:
+    """
+    Streams rows (dicts of field name -> value, primary key included) into a
+    table in batches: COPY FROM STDIN on PostgreSQL, bulk_create elsewhere.
+    """
+
+    def __init__(self, model, batch_size, use_copy):
+        self.model = model
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.count = 0
+        self.batch = []
+
+    def add(self, row):
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def write(self, rows):
+        for row in rows:
+            self.add(row)
+        self.flush()
+        return self.count
+
+    def flush(self):
+        if not self.batch:
+            return
+        if self.use_copy:
+            self._copy(self.batch)
+        else:
+            with _generated_timestamps(self.model, self.batch[0]):
+                self.model.objects.bulk_create([self.model(**row) for row in self.batch], batch_size=self.batch_size)
+        self.count += len(self.batch)
+        self.batch = []
+
+    def _copy(self, batch):
+        names = list(batch[0])
+        columns = ', '.join(connection.ops.quote_name(self.model._meta.get_field(n).column) for n in names)
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write('\t'.join(_copy_value(row[n]) for n in names))
+            buffer.write('\n')
+        buffer.seek(0)
+        sql = f'COPY {connection.ops.quote_name(self.model._meta.db_table)} ({columns}) FROM STDIN'
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset (users, courses, offerings, contents, enrollments, '
+        'payments, quizzes, questions, choices, attempts) for reproducing production load locally. '
+        'Example: seed_scale --students 100000 --courses 2000 --attempts 5000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--teachers', type=int, default=50)
+        parser.add_argument('--courses', type=int, default=100)
+        parser.add_argument('--offerings-per-course', type=int, default=2)
+        parser.add_argument('--contents-per-offering', type=int, default=5)
+        parser.add_argument('--enrollments-per-student', type=int, default=3)
+        parser.add_argument('--questions-per-quiz', type=int, default=10)
+        parser.add_argument('--choices-per-question', type=int, default=4)
+        parser.add_argument('--attempts', type=int, default=5000)
+        parser.add_argument('--answers', action='store_true', help='Also store per-question answers for every attempt')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same dataset')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='scale', help='Username prefix of the generated users')
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users with prefix '{options['prefix']}_' already exist, use another --prefix.")
+        if options['enrollments_per_student'] > options['courses'] * options['offerings_per_course']:
+            raise CommandError('--enrollments-per-student cannot exceed the number of offerings.')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.use_copy = connection.vendor == 'postgresql'
+        self.now = timezone.now()
+        self.started = time.monotonic()
+        self.stdout.write(f"Seeding with {'COPY' if self.use_copy else 'bulk_create'} (seed {options['seed']})...")
+
+        with transaction.atomic():
+            self.seed()
+            if self.use_copy:
+                self.reset_sequences()
+
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.monotonic() - self.started:.1f}s.'))
+
+    # -- helpers ----------------------------------------------------------
+
+    def next_id(self, model):
+        return (model.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+    def writer(self, model):
+        return TableWriter(model, self.options['batch_size'], self.use_copy)
+
+    def report(self, model, count, table_started):
+        elapsed = time.monotonic() - table_started
+        self.stdout.write(f'  {model.__name__}: {count} rows in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f}/s)')
+
+    def write(self, model, rows):
+        table_started = time.monotonic()
+        count = self.writer(model).write(rows)
+        self.report(model, count, table_started)
+
+    def past(self, max_days=365):
+        return self.now - timedelta(seconds=self.rng.randrange(max_days * 24 * 60 * 60))
+
+    def reset_sequences(self):
+        models = [CustomUser, Course, CourseOffering, CourseContent, Payment, Enrollment,
+                  Quiz, Question, Choice, StudentQuizAttempt, QuizAnswer]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    # -- dataset ----------------------------------------------------------
+
+    def seed(self):
+        o = self.options
+        rng = self.rng
+        prefix = o['prefix']
+        password = make_password('password')
+
+        def users(start, count, role):
+            for i in range(count):
+                yield {
+                    'id': start + i, 'username': f'{prefix}_{role}_{i}', 'email': f'{prefix}_{role}_{i}@example.com',
+                    'password': password, 'role': role, 'first_name': '', 'last_name': '',
+                    'is_active': True, 'is_staff': False, 'is_superuser': False, 'date_joined': self.past(),
+                }
+
+        teacher_start = self.next_id(CustomUser)
+        teacher_ids = range(teacher_start, teacher_start + o['teachers'])
+        student_start = teacher_start + o['teachers']
+        student_ids = range(student_start, student_start + o['students'])
+        self.write(CustomUser, users(teacher_start, o['teachers'], 'teacher'))
+        self.write(CustomUser, users(student_start, o['students'], 'student'))
+
+        words = ['python', 'django', 'data', 'science', 'machine', 'learning', 'web', 'design', 'cloud',
+                 'security', 'algebra', 'physics', 'history', 'writing', 'finance', 'marketing']
+
+        course_start = self.next_id(Course)
+        course_ids = range(course_start, course_start + o['courses'])
+        course_free = {}
+
+        def courses():
+            for course_id in course_ids:
+                is_free = rng.random() < 0.1
+                course_free[course_id] = is_free
+                topic = ' '.join(rng.sample(words, 2)).title()
+                created_at = self.past()
+                yield {
+                    'id': course_id, 'title': f'{topic} {course_id}',
+                    'description': ' '.join(rng.choice(words) for _ in range(rng.randint(20, 80))),
+                    'teacher_id': rng.choice(teacher_ids) if rng.random() < 0.9 else None,
+                    'price': Decimal('0.00') if is_free else Decimal(rng.randrange(499, 9999)) / 100,
+                    'is_free': is_free, 'created_at': created_at, 'updated_at': created_at,
+                }
+        self.write(Course, courses())
+
+        offering_start = self.next_id(CourseOffering)
+        offering_course = {}
+
+        def offerings():
+            offering_id = offering_start
+            for course_id in course_ids:
+                for _ in range(o['offerings_per_course']):
+                    offering_course[offering_id] = course_id
+                    start = date(self.now.year, 1, 1) + timedelta(days=rng.randrange(300))
+                    created_at = self.past()
+                    yield {
+                        'id': offering_id, 'course_id': course_id, 'teacher_id': rng.choice(teacher_ids),
+                        'semester': rng.choice(['Spring', 'Summer', 'Fall']), 'year': start.year,
+                        'start_date': start, 'end_date': start + timedelta(days=90),
+                        'meet_link': f'https://meet.example.com/{offering_id}', 'class_description': None,
+                        'created_at': created_at, 'updated_at': created_at,
+                    }
+                    offering_id += 1
+        self.write(CourseOffering, offerings())
+        offering_ids = list(offering_course)
+
+        content_start = self.next_id(CourseContent)
+
+        def contents():
+            content_id = content_start
+            for offering_id in offering_ids:
+                for n in range(o['contents_per_offering']):
+                    created_at = self.past()
+                    yield {
+                        'id': content_id, 'course_offering_id': offering_id, 'title': f'Lesson {n + 1}',
+                        'link': f'https://example.com/lesson/{content_id}',
+                        'created_at': created_at, 'updated_at': created_at,
+                    }
+                    content_id += 1
+        self.write(CourseContent, contents())
+
+        # Enrollments and their payments are generated together so each paid
+        # enrollment can point at its payment.
+        enrollment_pairs = []
+        payment_rows = []
+        enrollment_rows = []
+        payment_id = self.next_id(Payment)
+        enrollment_id = self.next_id(Enrollment)
+        for student_id in student_ids:
+            for offering_id in rng.sample(offering_ids, o['enrollments_per_student']):
+                course_id = offering_course[offering_id]
+                enrolled_at = self.past()
+                linked_payment = None
+                if not course_free[course_id]:
+                    linked_payment = payment_id
+                    payment_rows.append({
+                        'id': payment_id, 'student_id': student_id, 'course_id': course_id,
+                        'course_offering_id': offering_id, 'amount': Decimal(rng.randrange(499, 9999)) / 100,
+                        'payment_method': 'upi', 'status': 'success', 'transaction_id': f'{prefix.upper()}{payment_id}',
+                        'payment_source': 'dummy', 'created_at': enrolled_at, 'updated_at': enrolled_at,
+                    })
+                    payment_id += 1
+                enrollment_rows.append({
+                    'id': enrollment_id, 'student_id': student_id, 'course_offering_id': offering_id,
+                    'payment_id': linked_payment, 'enrolled_at': enrolled_at, 'grade': None,
+                })
+                enrollment_pairs.append((student_id, offering_id))
+                enrollment_id += 1
+        self.write(Payment, payment_rows)
+        self.write(Enrollment, enrollment_rows)
+        del payment_rows, enrollment_rows
+
+        quiz_start = self.next_id(Quiz)
+        offering_quiz = {offering_id: quiz_start + i for i, offering_id in enumerate(offering_ids)}
+        self.write(Quiz, (
+            {'id': quiz_id, 'course_offering_id': offering_id, 'title': f'Final Quiz {quiz_id}',
+             'description': None, 'pass_percentage': 50.0, 'created_at': self.past()}
+            for offering_id, quiz_id in offering_quiz.items()
+        ))
+
+        question_start = self.next_id(Question)
+        choice_start = self.next_id(Choice)
+        # quiz id -> [(question id, correct choice id, [choice ids])]
+        answer_keys = {}
+        question_rows = []
+        choice_rows = []
+        question_id, choice_id = question_start, choice_start
+        for quiz_id in offering_quiz.values():
+            key = []
+            for n in range(o['questions_per_quiz']):
+                correct_index = rng.randrange(o['choices_per_question'])
+                choice_ids = list(range(choice_id, choice_id + o['choices_per_question']))
+                question_rows.append({
+                    'id': question_id, 'quiz_id': quiz_id, 'text': f'Question {n + 1} of quiz {quiz_id}?',
+                    'question_type': 'single_choice', 'order': n + 1,
+                })
+                for c, cid in enumerate(choice_ids):
+                    choice_rows.append({'id': cid, 'question_id': question_id, 'text': f'Option {c + 1}', 'is_correct': c == correct_index})
+                key.append((question_id, choice_ids[correct_index], choice_ids))
+                question_id += 1
+                choice_id += o['choices_per_question']
+            answer_keys[quiz_id] = key
+        self.write(Question, question_rows)
+        self.write(Choice, choice_rows)
+        del question_rows, choice_rows
+
+        # Attempts and their answers are streamed side by side; answer rows
+        # reference attempts, so attempts are always flushed first.
+        table_started = time.monotonic()
+        attempt_writer = self.writer(StudentQuizAttempt)
+        answer_writer = self.writer(QuizAnswer)
+        attempt_start = self.next_id(StudentQuizAttempt)
+        answer_id = self.next_id(QuizAnswer)
+        for attempt_id in range(attempt_start, attempt_start + o['attempts']):
+            student_id, offering_id = rng.choice(enrollment_pairs)
+            quiz_id = offering_quiz[offering_id]
+            skill = rng.random()
+            correct = 0
+            key = answer_keys[quiz_id]
+            answers = []
+            # Answers are always drawn, so --answers does not change the attempts
+            for q_id, correct_id, choice_ids in key:
+                if rng.random() < 0.05:
+                    picked = None
+                elif rng.random() < skill:
+                    picked = correct_id
+                else:
+                    picked = rng.choice(choice_ids)
+                correct += picked == correct_id
+                if o['answers']:
+                    answers.append({'id': answer_id, 'attempt_id': attempt_id, 'question_id': q_id,
+                                    'choice_id': picked, 'is_correct': picked == correct_id})
+                    answer_id += 1
+            score = correct / len(key) * 100 if key else 0
+            attempt_writer.add({
+                'id': attempt_id, 'student_id': student_id, 'quiz_id': quiz_id,
+                'score': score, 'passed': score >= 50.0, 'completed_at': self.past(),
+            })
+            if o['answers']:
+                if len(answer_writer.batch) + len(answers) >= answer_writer.batch_size:
+                    attempt_writer.flush()
+                for answer in answers:
+                    answer_writer.add(answer)
+        attempt_writer.flush()
+        answer_writer.flush()
+        self.report(StudentQuizAttempt, attempt_writer.count, table_started)
+        if o['answers']:
+            self.report(QuizAnswer, answer_writer.count, table_started)
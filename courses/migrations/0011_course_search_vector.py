@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:14
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# PostgreSQL only: keep Course.search_vector in sync with title/description via
+# a trigger (so bulk inserts and queryset.update() are covered too), backfill
+# existing rows and index the column with GIN. Other databases use the
+# in-process index in courses/search.py and skip this entirely.
+CREATE_SEARCH_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION courses_course_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER courses_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON courses_course
+    FOR EACH ROW EXECUTE FUNCTION courses_course_search_vector_update();
+    """,
+    """
+    UPDATE courses_course SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B');
+    """,
+    "CREATE INDEX course_search_vector_gin ON courses_course USING gin (search_vector);",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS course_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course;",
+    "DROP FUNCTION IF EXISTS courses_course_search_vector_update();",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in CREATE_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
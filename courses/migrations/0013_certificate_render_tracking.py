@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='template_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
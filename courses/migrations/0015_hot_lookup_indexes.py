@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_quizanswer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['student', 'course_offering'], name='certificate_student_offer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('status', 'success')), fields=['student', 'course'], name='payment_success_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['student', 'course', 'status'], name='payment_student_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentquizattempt',
+            index=models.Index(fields=['student', 'quiz', '-completed_at'], name='attempt_student_quiz_idx'),
+        ),
+    ]
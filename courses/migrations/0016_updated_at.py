@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:36
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows were last changed no later than now; created_at is the best known value
+    for model_name in ('Course', 'CourseOffering', 'CourseContent'):
+        apps.get_model('courses', model_name).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='coursecontent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='courseoffering',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['updated_at'], name='course_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseoffering',
+            index=models.Index(fields=['updated_at'], name='offering_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # Database cache tables (LOGIN_NOTIFICATION_CACHE without REDIS_URL);
+    # createcachetable skips tables that already exist.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_emailoutbox_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
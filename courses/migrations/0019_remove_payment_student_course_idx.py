@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_login_notification_cache_table'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_student_course_idx',
+        ),
+    ]
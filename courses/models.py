@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary_storage.storage import VideoMediaCloudinaryStorage, RawMediaCloudinaryStorage
 import uuid
 
@@ -13,6 +15,11 @@ class CustomUser(AbstractUser):
     otp = models.CharField(max_length=6, blank=True, null=True)
     otp_created_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['role', 'id'], name='user_role_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -24,6 +31,15 @@ class Course(models.Model):
     photo = models.ImageField(upload_to='course_photos/', blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, help_text="Course price in INR")
     is_free = models.BooleanField(default=False, help_text="Mark as free course")
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a PostgreSQL trigger (see courses/search.py); unused on SQLite
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='course_created_id_idx'),
+            models.Index(fields=['updated_at'], name='course_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -44,6 +60,13 @@ class CourseOffering(models.Model):
     meet_link = models.URLField(blank=True, null=True)
     class_description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='offering_created_id_idx'),
+            models.Index(fields=['updated_at'], name='offering_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.semester} {self.year} ({self.teacher.username})"
@@ -78,6 +101,13 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='payment_created_id_idx'),
+            # Access checks only ever look at successful payments
+            models.Index(fields=['student', 'course'], condition=models.Q(status='success'), name='payment_success_student_idx'),
+        ]
+
     def __str__(self):
         course_title = self.course.title if self.course else self.course_offering.course.title
         return f"{self.student.username} - {course_title} - ₹{self.amount} ({self.status})"
@@ -91,6 +121,9 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course_offering')
+        indexes = [
+            models.Index(fields=['enrolled_at', 'id'], name='enrollment_enrolled_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} enrolled in {self.course_offering}"
@@ -120,6 +153,7 @@ class CourseContent(models.Model):
     link = models.URLField(blank=True, null=True, help_text="External link (e.g., Google Meet)")
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} ({self.course_offering.course.title})"
@@ -164,15 +198,68 @@ class StudentQuizAttempt(models.Model):
     passed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'quiz', '-completed_at'], name='attempt_student_quiz_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.username} - {self.quiz.title} - {self.score}%"
 
+class QuizAnswer(models.Model):
+    attempt = models.ForeignKey(StudentQuizAttempt, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
+    choice = models.ForeignKey(Choice, on_delete=models.SET_NULL, null=True, blank=True, related_name='answers')
+    is_correct = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} - Question {self.question_id} - {'correct' if self.is_correct else 'wrong'}"
+
 class Certificate(models.Model):
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='certificates')
     course_offering = models.ForeignKey(CourseOffering, on_delete=models.CASCADE, related_name='certificates')
     issued_at = models.DateTimeField(auto_now_add=True)
     certificate_id = models.CharField(max_length=100, unique=True, default=uuid.uuid4)
     file = models.FileField(upload_to='certificates/', blank=True, null=True, storage=RawMediaCloudinaryStorage())
+    # Hash of the certificate template the stored file was rendered from
+    template_version = models.CharField(max_length=64, blank=True, default='')
+    rendered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'course_offering'], name='certificate_student_offer_idx'),
+        ]
 
     def __str__(self):
         return f"Certificate for {self.student.username} - {self.course_offering}"
+
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    sender_name = models.CharField(max_length=100, default='Learning Platform')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # When the row may next be picked up: the retry time for pending rows,
+    # the lease expiry for rows a worker is currently sending.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    # Not sent after this time (e.g. an OTP past its lifetime): expired instead of retried
+    expires_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
@@ -0,0 +1,52 @@
+"""
+Login notification policy.
+
+Decides whether a login deserves a "New Login" email. All state lives in the
+LOGIN_NOTIFICATION_CACHE (Redis, or a database table without it, so every
+worker sees the same devices), and a decision costs one to three cache
+operations:
+
+* Repeat logins from the same IP and user agent within
+  LOGIN_NOTIFICATION_WINDOW_SECONDS are coalesced into the first one.
+* Outside that window only devices (user agents) not seen for this user in
+  the last LOGIN_NOTIFICATION_DEVICE_TTL_SECONDS trigger an email.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+SEND = 'send'
+COALESCED = 'coalesced'
+KNOWN_DEVICE = 'known_device'
+
+
+def _fingerprint(*parts):
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', 'Unknown')
+
+
+def login_notification_decision(user, ip_address, user_agent):
+    """
+    Record a login and return SEND, COALESCED or KNOWN_DEVICE.
+
+    cache.add() is atomic, so concurrent logins from the same device send at
+    most one email.
+    """
+    cache = caches[settings.LOGIN_NOTIFICATION_CACHE]
+
+    session_key = f'login-notify:{user.pk}:{_fingerprint(ip_address, user_agent)}'
+    if not cache.add(session_key, 1, settings.LOGIN_NOTIFICATION_WINDOW_SECONDS):
+        return COALESCED
+
+    device_key = f'login-device:{user.pk}:{_fingerprint(user_agent)}'
+    if cache.add(device_key, 1, settings.LOGIN_NOTIFICATION_DEVICE_TTL_SECONDS):
+        return SEND
+    cache.touch(device_key, settings.LOGIN_NOTIFICATION_DEVICE_TTL_SECONDS)
+    return KNOWN_DEVICE
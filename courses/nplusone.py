@@ -0,0 +1,116 @@
+"""
+Runtime N+1 query detector (opt-in, NPLUSONE_DETECTION=True).
+
+Every SQL statement run while handling a request is grouped by its shape:
+the statement with parameters already replaced by placeholders, IN lists
+collapsed and inline numbers blanked. When one shape runs more than
+NPLUSONE_THRESHOLD times in a request, the view, the SQL and the stack of
+the call that crossed the threshold are logged on `courses.performance`.
+With NPLUSONE_STRICT=True the request raises NPlusOneError instead, which
+makes the test client (and check_endpoint_budgets) fail loudly.
+
+The same detection is available outside requests:
+
+    with detect_nplusone(threshold=3, strict=True):
+        serializer.data
+"""
+import logging
+import re
+import traceback
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('courses.performance')
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_WHITESPACE = re.compile(r'\s+')
+_IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def sql_shape(sql):
+    shape = _IN_LIST.sub('(...)', sql)
+    shape = _NUMBER.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def _project_stack():
+    """Stack frames of this project's code, innermost last, without Django/DRF internals"""
+    base = str(Path(settings.BASE_DIR))
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base) and 'site-packages' not in frame.filename
+        and not frame.filename.endswith('nplusone.py')
+    ]
+    return ''.join(traceback.format_list(frames[-8:]))
+
+
+class QueryShapes:
+    def __init__(self, threshold, view=None):
+        self.threshold = threshold
+        self.view = view
+        self.counts = {}
+        self.offenders = {}  # shape -> stack of the call that crossed the threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_IGNORED):
+            shape = sql_shape(sql)
+            count = self.counts.get(shape, 0) + 1
+            self.counts[shape] = count
+            if count == self.threshold + 1:
+                self.offenders[shape] = _project_stack()
+        return execute(sql, params, many, context)
+
+    def report(self):
+        return [
+            {'view': self.view, 'count': self.counts[shape], 'sql': shape, 'stack': stack}
+            for shape, stack in self.offenders.items()
+        ]
+
+
+def format_report(report):
+    return '\n'.join(
+        f"N+1 in {item['view'] or 'code'}: {item['count']} x {item['sql']}\n{item['stack']}"
+        for item in report
+    )
+
+
+@contextmanager
+def detect_nplusone(threshold=None, strict=None, view=None):
+    """Watch the queries of the enclosed block on every connection; yields the QueryShapes"""
+    threshold = settings.NPLUSONE_THRESHOLD if threshold is None else threshold
+    strict = settings.NPLUSONE_STRICT if strict is None else strict
+    shapes = QueryShapes(threshold, view)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(shapes))
+        yield shapes
+
+    report = shapes.report()
+    if report:
+        if strict:
+            raise NPlusOneError(format_report(report))
+        logger.warning(format_report(report), extra={'nplusone': report})
+
+
+class NPlusOneMiddleware:
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_nplusone(view=f'{request.method} {request.path}') as shapes:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            if match:
+                shapes.view = f'{match.view_name} ({shapes.view})'
+        return response
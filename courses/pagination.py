@@ -0,0 +1,75 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+SEARCH_RANK = 'search_rank'  # annotation added by search.search_courses
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination that is opt-in per request.
+
+    Existing pages fetch whole lists and expect a plain JSON array, so a
+    response is only paginated when the client asks for it with
+    ?page_size=N or follows a ?cursor=... link from a previous page.
+    Each ViewSet picks its keyset with a `cursor_ordering` attribute,
+    backed by a matching index on the model.
+
+    Ranked search results (?search=...) keep their relevance order and are
+    paged by number instead (?page=N), as a rank has no keyset to resume from.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+    page_query_param = 'page'
+    invalid_page_message = 'Invalid page.'
+
+    search_page = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        if SEARCH_RANK in queryset.query.annotations:
+            return self.paginate_search_results(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_search_results(self, queryset, request):
+        """One page of a ranked queryset; an extra row tells whether there is a next one, nothing is counted"""
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        try:
+            self.search_page = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.search_page < 1:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.search_page - 1) * self.page_size
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.has_previous = self.search_page > 1
+        return results[:self.page_size]
+
+    def get_next_link(self):
+        if self.search_page is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.page_query_param, self.search_page + 1)
+
+    def get_previous_link(self):
+        if self.search_page is None:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        if self.search_page == 2:
+            return remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(self.base_url, self.page_query_param, self.search_page - 1)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
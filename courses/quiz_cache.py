@@ -0,0 +1,36 @@
+"""
+Quiz content versions.
+
+Every quiz has a version number in the cache that is bumped whenever one of
+its questions or choices is saved or deleted (see signals.py). Cached data
+derived from the quiz content (answer key, quiz paper) is keyed on it, so a
+bump makes all of it stale at once and old entries simply expire.
+
+Bumps happen on commit: bumped earlier, a concurrent request could still
+read the old rows and cache them under the new version.
+"""
+from django.db import transaction
+
+from .cache_versions import bump_version, current_version
+
+QUIZ_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _version_key(quiz_id):
+    return f'quiz-version:{quiz_id}'
+
+
+def quiz_version(quiz_id):
+    return current_version(_version_key(quiz_id))
+
+
+def bump_quiz_version(quiz_id):
+    bump_version(_version_key(quiz_id))
+
+
+def bump_quiz_version_on_commit(quiz_id):
+    transaction.on_commit(lambda: bump_quiz_version(quiz_id))
+
+
+def quiz_cache_key(prefix, quiz_id):
+    return f'{prefix}:{quiz_id}:v{quiz_version(quiz_id)}'
@@ -0,0 +1,30 @@
+"""
+Quiz paper: the questions and choices a student sees, without correctness
+flags. Built with one joined query and cached per quiz version, so every
+student opening the same quiz shares one copy.
+"""
+from django.core.cache import cache
+
+from .models import Question
+from .quiz_cache import QUIZ_CACHE_TIMEOUT, quiz_cache_key
+
+
+def build_quiz_paper(quiz_id):
+    questions = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by('order', 'id', 'choices__id').values_list(
+        'id', 'text', 'choices__id', 'choices__text'
+    )
+    for question_id, text, choice_id, choice_text in rows:
+        question = questions.setdefault(question_id, {'id': question_id, 'text': text, 'choices': []})
+        if choice_id is not None:
+            question['choices'].append({'id': choice_id, 'text': choice_text})
+    return list(questions.values())
+
+
+def get_quiz_paper(quiz_id):
+    key = quiz_cache_key('quiz-paper', quiz_id)
+    paper = cache.get(key)
+    if paper is None:
+        paper = build_quiz_paper(quiz_id)
+        cache.set(key, paper, QUIZ_CACHE_TIMEOUT)
+    return paper
@@ -0,0 +1,192 @@
+"""
+Per-request performance timings.
+
+ServerTimingMiddleware measures, for every request:
+
+* db: number of queries and time spent executing them (all connections)
+* tpl: time spent rendering templates (through TimedDjangoTemplates)
+* paypal / brevo / cloudinary / http: outbound HTTP calls, by host
+
+and reports them in a `Server-Timing` response header (visible in the
+browser devtools network tab) and in one JSON log line on the
+`courses.performance` logger. Template time includes queries that run
+lazily while rendering, so the entries may overlap.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('courses.performance')
+
+# Outbound hosts (matched by suffix) and the Server-Timing name they report under
+OUTBOUND_SERVICES = {
+    'paypal.com': 'paypal',
+    'brevo.com': 'brevo',
+    'sendinblue.com': 'brevo',
+    'cloudinary.com': 'cloudinary',
+}
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.outbound = {}
+        self._outbound_depth = 0
+        self._template_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    def as_dict(self):
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'template_ms': round(self.template_seconds * 1000, 1),
+            'outbound': {
+                service: {'calls': calls, 'ms': round(seconds * 1000, 1)}
+                for service, (calls, seconds) in self.outbound.items()
+            },
+        }
+
+
+def service_for_host(host):
+    host = (host or '').lower()
+    for suffix, service in OUTBOUND_SERVICES.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return service
+    return 'http'
+
+
+@contextmanager
+def outbound(service):
+    """Count the enclosed block as one outbound call to `service` for the current request"""
+    timings = _current.get()
+    if timings is None or timings._outbound_depth:
+        # Outside a request, or nested in a call already being timed (retries, redirects)
+        yield
+        return
+    timings._outbound_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._outbound_depth -= 1
+        calls, seconds = timings.outbound.get(service, (0, 0.0))
+        timings.outbound[service] = (calls + 1, seconds + time.perf_counter() - started)
+
+
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+
+def install_outbound_hook():
+    """
+    Time every urllib3 request. PayPal (through requests), Brevo and
+    Cloudinary all go through urllib3, so no call site has to be changed.
+    """
+    global _hook_installed
+    with _hook_lock:
+        if _hook_installed:
+            return
+        try:
+            from urllib3.connectionpool import HTTPConnectionPool
+        except ImportError:
+            return
+        urlopen = HTTPConnectionPool.urlopen
+
+        def timed_urlopen(self, *args, **kwargs):
+            with outbound(service_for_host(self.host)):
+                return urlopen(self, *args, **kwargs)
+
+        HTTPConnectionPool.urlopen = timed_urlopen
+        _hook_installed = True
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None or timings._template_depth:
+            # Templates rendered from inside another one (e.g. crispy forms) are already counted
+            return super().render(context, request)
+        timings._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings._template_depth -= 1
+            timings.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def server_timing_header(data):
+    entries = [f"db;dur={data['db_ms']};desc=\"{data['db_queries']} queries\""]
+    if data['template_ms']:
+        entries.append(f"tpl;dur={data['template_ms']}")
+    for service, call in data['outbound'].items():
+        entries.append(f"{service};dur={call['ms']};desc=\"{call['calls']} calls\"")
+    entries.append(f"total;dur={data['total_ms']}")
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Add first in MIDDLEWARE so the total covers the other middleware.
+    SERVER_TIMING_HEADER = False keeps the log line but drops the header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_outbound_hook()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        data = timings.as_dict()
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = server_timing_header(data)
+
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **data,
+        }), extra={'timings': data})
+        return response
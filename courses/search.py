@@ -0,0 +1,125 @@
+"""
+Course search engine.
+
+On PostgreSQL courses are matched against the stored `Course.search_vector`
+tsvector column (kept up to date by a database trigger and backed by a GIN
+index, see migration 0011) with prefix matching and ts_rank ordering.
+
+Other databases (SQLite for local testing) fall back to a small in-process
+inverted index that is built once from the course titles and descriptions
+and rebuilt after a Course is saved or deleted. It is built from the primary
+database: an index built from a lagging read replica would be kept for the
+life of the process.
+"""
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, IntegerField, When
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class InvertedIndex:
+    """Token -> {course_id: weight} postings with prefix lookups over sorted terms"""
+
+    def __init__(self, rows):
+        postings = defaultdict(lambda: defaultdict(int))
+        for course_id, title, description in rows:
+            for token in tokenize(title):
+                postings[token][course_id] += TITLE_WEIGHT
+            for token in tokenize(description):
+                postings[token][course_id] += DESCRIPTION_WEIGHT
+        self.postings = {term: dict(ids) for term, ids in postings.items()}
+        self.terms = sorted(self.postings)
+
+    def _prefix_matches(self, prefix):
+        scores = defaultdict(int)
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            for course_id, weight in self.postings[term].items():
+                scores[course_id] += weight
+        return scores
+
+    def search(self, query):
+        """Return course ids matching every query token as a prefix, best match first"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for token in tokens:
+            matches = self._prefix_matches(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {cid: scores[cid] + weight for cid, weight in matches.items() if cid in scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda cid: (-scores[cid], -cid))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_course_index():
+    global _index
+    index = _index
+    if index is None:
+        from .models import Course
+        with _index_lock:
+            if _index is None:
+                _index = InvertedIndex(Course.objects.using('default').values_list('id', 'title', 'description'))
+            index = _index
+    return index
+
+
+def invalidate_course_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def build_prefix_tsquery(query):
+    """'pyth progr' -> 'pyth:* & progr:*' (tokens are \\w+ only, so safe for raw tsquery)"""
+    return ' & '.join(f'{token}:*' for token in tokenize(query))
+
+
+def search_courses(queryset, query):
+    """Filter and rank a Course queryset by a free-text query"""
+    if not tokenize(query):
+        return queryset
+
+    if connections[queryset.db].vendor == 'postgresql':
+        ts_query = SearchQuery(build_prefix_tsquery(query), search_type='raw', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=ts_query).annotate(
+            search_rank=SearchRank(F('search_vector'), ts_query)
+        ).order_by('-search_rank', '-id')
+
+    course_ids = get_course_index().search(query)
+    if not course_ids:
+        return queryset.none()
+    ranking = Case(*[When(pk=cid, then=pos) for pos, cid in enumerate(course_ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=course_ids).annotate(search_rank=ranking).order_by('search_rank')
+
+
+class CourseSearchFilter(filters.SearchFilter):
+    """Drop-in replacement for SearchFilter on CourseViewSet, same ?search= parameter"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_courses(queryset, query)
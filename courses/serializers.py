@@ -1,5 +1,8 @@
+from django.db.models import Case, Count, Exists, IntegerField, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
-from .models import CustomUser, Course, CourseOffering, Enrollment, Payment, CourseContent
+from .entitlements import get_entitlements
+from .models import CustomUser, Course, CourseOffering, Enrollment, Payment, CourseContent, Quiz
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,6 +26,24 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'teacher', 'teacher_name', 'teacher_count', 'photo', 'price', 'is_free', 'formatted_price', 'user_has_paid', 'created_at', 'photo_file']
         read_only_fields = ['teacher', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Annotate everything the list needs so serializing adds no queries per course"""
+        offering_teachers = CourseOffering.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course').annotate(c=Count('teacher', distinct=True)).values('c')
+        course_teacher_has_offering = CourseOffering.objects.filter(
+            course=OuterRef('pk'), teacher=OuterRef('teacher')
+        )
+        queryset = queryset.select_related('teacher').defer('search_vector').annotate(
+            teacher_count_value=Coalesce(Subquery(offering_teachers, output_field=IntegerField()), 0) + Case(
+                When(Q(teacher__isnull=False) & ~Exists(course_teacher_has_offering), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+        return queryset
+
     def get_photo(self, obj):
         if obj.photo:
             request = self.context.get('request')
@@ -32,6 +53,8 @@ class CourseSerializer(serializers.ModelSerializer):
         return None
     
     def get_teacher_count(self, obj):
+        if hasattr(obj, 'teacher_count_value'):
+            return obj.teacher_count_value
         teacher_ids = set()
         if obj.teacher_id:
             teacher_ids.add(obj.teacher_id)
@@ -57,12 +80,8 @@ class CourseSerializer(serializers.ModelSerializer):
     def get_user_has_paid(self, obj):
         """Check if current user has paid for this course"""
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Payment.objects.filter(
-                student=request.user,
-                course=obj,
-                status='success'
-            ).exists()
+        if request:
+            return get_entitlements(request).has_paid_course(obj.id)
         return False
 
     def create(self, validated_data):
@@ -95,7 +114,25 @@ class CourseOfferingSerializer(serializers.ModelSerializer):
         model = CourseOffering
         fields = ['id', 'course', 'course_title', 'teacher', 'teacher_name', 'semester', 'year', 'start_date', 'end_date', 'meet_link', 'class_description', 'quiz_id', 'contents']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_contents', True):
+            self.fields.pop('contents')
+
+    @staticmethod
+    def setup_eager_loading(queryset, include_contents=True):
+        """Load course, teacher, contents and the first quiz with a fixed number of queries"""
+        queryset = queryset.select_related('course', 'teacher').prefetch_related(
+            Prefetch('quizzes', queryset=Quiz.objects.order_by('pk').only('id', 'course_offering'), to_attr='prefetched_quizzes'),
+        )
+        if include_contents:
+            queryset = queryset.prefetch_related('contents')
+        return queryset
+
     def get_quiz_id(self, obj):
+        if hasattr(obj, 'prefetched_quizzes'):
+            quizzes = obj.prefetched_quizzes
+            return quizzes[0].id if quizzes else None
         quiz = obj.quizzes.first()
         return quiz.id if quiz else None
 
@@ -109,6 +146,11 @@ class PaymentSerializer(serializers.ModelSerializer):
         fields = ['id', 'student', 'student_name', 'course_offering', 'course_title', 'course_price', 'amount', 'payment_method', 'status', 'transaction_id', 'created_at']
         read_only_fields = ['student', 'amount', 'status', 'transaction_id', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Fetch payment, student, offering and course in one joined query"""
+        return queryset.select_related('student', 'course_offering__course')
+
     def create(self, validated_data):
         import uuid
         transaction_id = f"TXN{uuid.uuid4().hex[:12].upper()}"
@@ -125,13 +167,13 @@ class PaymentSerializer(serializers.ModelSerializer):
         return payment
 
 class EnrollmentSerializer(serializers.ModelSerializer):
-    course_title = serializers.SerializerMethodField()
-    course_id = serializers.SerializerMethodField()
-    teacher_name = serializers.SerializerMethodField()
-    semester = serializers.SerializerMethodField()
-    year = serializers.SerializerMethodField()
-    meet_link = serializers.SerializerMethodField()
-    class_description = serializers.SerializerMethodField()
+    course_title = serializers.ReadOnlyField(source='course_offering.course.title')
+    course_id = serializers.ReadOnlyField(source='course_offering.course_id')
+    teacher_name = serializers.ReadOnlyField(source='course_offering.teacher.username')
+    semester = serializers.ReadOnlyField(source='course_offering.semester')
+    year = serializers.ReadOnlyField(source='course_offering.year')
+    meet_link = serializers.ReadOnlyField(source='course_offering.meet_link')
+    class_description = serializers.ReadOnlyField(source='course_offering.class_description')
     student_name = serializers.ReadOnlyField(source='student.username')
     course_photo = serializers.SerializerMethodField()
 
@@ -140,51 +182,46 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'student', 'student_name', 'course_offering', 'payment', 'enrolled_at', 'grade', 
                   'course_title', 'course_id', 'teacher_name', 'semester', 'year', 'meet_link', 'class_description', 'course_photo']
 
-    def get_offering_safe(self, obj):
-        try:
-            return obj.course_offering
-        except:
-            return None
-
-    def get_course_title(self, obj):
-        offering = self.get_offering_safe(obj)
-        if offering and offering.course:
-            return offering.course.title
-        return "Unknown Course"
-
-    def get_course_id(self, obj):
-        offering = self.get_offering_safe(obj)
-        if offering and offering.course:
-            return offering.course.id
-        return None
-
-    def get_teacher_name(self, obj):
-        offering = self.get_offering_safe(obj)
-        if offering and offering.teacher:
-            return offering.teacher.username
-        return None
-
-    def get_semester(self, obj):
-        offering = self.get_offering_safe(obj)
-        return offering.semester if offering else None
-
-    def get_year(self, obj):
-        offering = self.get_offering_safe(obj)
-        return offering.year if offering else None
-
-    def get_meet_link(self, obj):
-        offering = self.get_offering_safe(obj)
-        return offering.meet_link if offering else None
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Fetch enrollment, student, offering, course and teacher in one joined query"""
+        return queryset.select_related(
+            'student',
+            'course_offering__course',
+            'course_offering__teacher',
+        )
 
-    def get_class_description(self, obj):
-        offering = self.get_offering_safe(obj)
-        return offering.class_description if offering else None
-        
     def get_course_photo(self, obj):
-        offering = self.get_offering_safe(obj)
-        if offering and offering.course and offering.course.photo:
+        photo = obj.course_offering.course.photo
+        if photo:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(offering.course.photo.url)
-            return offering.course.photo.url
+                return request.build_absolute_uri(photo.url)
+            return photo.url
         return None
+
+class CatalogEntrySerializer(serializers.ModelSerializer):
+    """A catalog course as seen by the requesting user, read-only"""
+    teacher_name = serializers.ReadOnlyField(source='teacher.username')
+    teacher_count = serializers.IntegerField(source='teacher_count_value', read_only=True)
+    formatted_price = serializers.ReadOnlyField(source='get_formatted_price')
+    is_enrolled = serializers.BooleanField(read_only=True)
+    has_paid = serializers.BooleanField(read_only=True)
+    has_access = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'teacher', 'teacher_name', 'teacher_count', 'photo', 'price', 'is_free', 'formatted_price',
+                  'is_enrolled', 'has_paid', 'has_access', 'created_at']
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_eager_loading(queryset, user):
+        """Annotate the user's enrollment and payment state, so the whole page is one query"""
+        return CourseSerializer.setup_eager_loading(queryset).annotate(
+            is_enrolled=Exists(Enrollment.objects.filter(student=user, course_offering__course=OuterRef('pk'))),
+            has_paid=Exists(Payment.objects.filter(student=user, course=OuterRef('pk'), status='success')),
+        )
+
+    def get_has_access(self, obj):
+        return obj.is_enrolled or obj.has_paid
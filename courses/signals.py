@@ -1,22 +1,30 @@
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
-from .brevo_email import send_brevo_email
+from .email_outbox import enqueue_email
+from .notification_policy import SEND, get_client_ip, login_notification_decision
+from .catalog_cache import bump_catalog_generation_on_commit
+from .quiz_cache import bump_quiz_version_on_commit
+from .entitlements import invalidate_entitlements
+from .models import Choice, Course, CourseOffering, Enrollment, Payment, Question
+from .search import invalidate_course_index
 
 
 @receiver(user_logged_in)
 def send_login_notification(sender, request, user, **kwargs):
     """
-    Send an email notification when a user logs in using Brevo API.
+    Queue an email notification when a user logs in from a new device.
+    Repeat logins are coalesced by the notification policy.
     """
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip_address = x_forwarded_for.split(',')[0]
-    else:
-        ip_address = request.META.get('REMOTE_ADDR', 'Unknown')
+    ip_address = get_client_ip(request)
     user_agent = request.META.get('HTTP_USER_AGENT', 'Unknown device')
+    if login_notification_decision(user, ip_address, user_agent) != SEND:
+        return
     timestamp = timezone.now().strftime('%B %d, %Y at %I:%M %p %Z')
     context = {
         'username': user.username,
@@ -26,15 +34,62 @@ def send_login_notification(sender, request, user, **kwargs):
     }
     html_message = render_to_string('emails/login_notification.html', context)
     subject = 'New Login to Your Account - Learning Platform'
+    enqueue_email(
+        to_email=user.email,
+        subject=subject,
+        html_content=html_message
+    )
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_search_index(sender, **kwargs):
+    """
+    Drop the in-process search index used on non-PostgreSQL databases.
+    """
+    invalidate_course_index()
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=CourseOffering)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+    Retire every cached catalog response once the change is committed.
+    """
+    bump_catalog_generation_on_commit()
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_quiz_cache(sender, instance, **kwargs):
+    """
+    Invalidate the cached answer key and paper of the quiz this question
+    belongs to, once the change is committed.
+    """
+    bump_quiz_version_on_commit(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_choice_quiz_cache(sender, instance, origin=None, **kwargs):
+    """
+    Invalidate the cached answer key and paper of the quiz this choice
+    belongs to, once the change is committed.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model is not Choice:
+        # Cascade from a question/quiz delete: the question's own signal
+        # bumps the quiz, and looking it up here would cost a query per choice.
+        return
     try:
-        result = send_brevo_email(
-            to_email=user.email,
-            subject=subject,
-            html_content=html_message
-        )
-        if not result['success']:
-            print(f"Failed to send login notification: {result['message']}")
-    except Exception as e:
-        print(f"Failed to send login notification: {e}")
+        quiz_id = instance.question.quiz_id
+    except Question.DoesNotExist:
+        return
+    bump_quiz_version_on_commit(quiz_id)
 
 
+@receiver([post_save, post_delete], sender=Payment)
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_student_entitlements(sender, instance, **kwargs):
+    """
+    Drop the cached course access of the student once the change is committed.
+    """
+    student_id = instance.student_id
+    transaction.on_commit(lambda: invalidate_entitlements(student_id))
@@ -0,0 +1,436 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.utils import ConnectionDoesNotExist
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .catalog_cache import GENERATION_KEY, catalog_generation
+from .db_router import RequestRouting, _routing
+from .email_outbox import claim_batch, enqueue_email, record_result
+from .entitlements import get_entitlements
+from .grading import grade_submission
+from .item_analysis import _load_answers, item_analysis
+from .models import (
+    Choice, Course, CourseOffering, CustomUser, EmailOutbox, Enrollment, Payment, Question, Quiz, QuizAnswer,
+    StudentQuizAttempt,
+)
+from .notification_policy import COALESCED, KNOWN_DEVICE, SEND, login_notification_decision
+from .quiz_paper import get_quiz_paper
+from .search import get_course_index, invalidate_course_index, search_courses
+
+
+class GradeSubmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = CustomUser.objects.create_user('teacher', 'teacher@example.com', 'password', role='teacher')
+        course = Course.objects.create(title='Python', description='Basics', price=0, is_free=True)
+        offering = CourseOffering.objects.create(
+            course=course, teacher=teacher, semester='Spring', year=2026,
+            start_date=date(2026, 1, 1), end_date=date(2026, 4, 1),
+        )
+        self.quiz = Quiz.objects.create(course_offering=offering, title='Quiz', pass_percentage=50.0)
+        self.q1 = Question.objects.create(quiz=self.quiz, text='First?', order=1)
+        self.q1_right = Choice.objects.create(question=self.q1, text='Right', is_correct=True)
+        self.q1_wrong = Choice.objects.create(question=self.q1, text='Wrong')
+        self.q2 = Question.objects.create(quiz=self.quiz, text='Second?', order=2)
+        self.q2_right = Choice.objects.create(question=self.q2, text='Right', is_correct=True)
+        self.q2_wrong = Choice.objects.create(question=self.q2, text='Wrong')
+
+    def test_correct_answer(self):
+        result = grade_submission(self.quiz, {
+            f'question_{self.q1.id}': str(self.q1_right.id),
+            f'question_{self.q2.id}': str(self.q2_wrong.id),
+        })
+        self.assertEqual(result.total_questions, 2)
+        self.assertEqual(result.correct_answers, 1)
+        self.assertEqual(result.score, 50.0)
+        self.assertTrue(result.passed)
+        self.assertEqual(result.correct_question_ids, {self.q1.id})
+        self.assertEqual(result.selections, {self.q1.id: self.q1_right.id, self.q2.id: self.q2_wrong.id})
+
+    def test_foreign_choice_is_not_counted(self):
+        # The correct choice of question 2, submitted as the answer to question 1
+        result = grade_submission(self.quiz, {f'question_{self.q1.id}': str(self.q2_right.id)})
+        self.assertEqual(result.correct_answers, 0)
+        self.assertIsNone(result.selections[self.q1.id])
+        self.assertFalse(result.passed)
+
+    def test_non_numeric_and_missing_values(self):
+        result = grade_submission(self.quiz, {f'question_{self.q1.id}': 'abc'})
+        self.assertEqual(result.correct_answers, 0)
+        self.assertEqual(result.selections, {self.q1.id: None, self.q2.id: None})
+        self.assertEqual(result.score, 0)
+
+    def test_answer_key_is_cached(self):
+        grade_submission(self.quiz, {})
+        with self.assertNumQueries(0):
+            grade_submission(self.quiz, {f'question_{self.q1.id}': str(self.q1_right.id)})
+
+    def test_answer_key_rebuilt_after_choice_saved(self):
+        answers = {f'question_{self.q1.id}': str(self.q1_wrong.id)}
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1_wrong.is_correct = True
+            self.q1_wrong.save()
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Choice.objects.create(question=self.q1, text='Also right', is_correct=True)
+        result = grade_submission(self.quiz, {f'question_{self.q1.id}': str(added.id)})
+        self.assertEqual(result.correct_answers, 1)
+
+    def test_answer_key_rebuilt_after_choice_deleted(self):
+        answers = {f'question_{self.q1.id}': str(self.q1_right.id), f'question_{self.q2.id}': str(self.q2_right.id)}
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1_right.delete()
+        result = grade_submission(self.quiz, answers)
+        self.assertEqual(result.correct_answers, 1)
+        self.assertIsNone(result.selections[self.q1.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Choice.objects.filter(pk=self.q2_right.pk).delete()
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 0)
+
+    def test_answer_key_rebuilt_after_question_saved_and_deleted(self):
+        answers = {f'question_{self.q1.id}': str(self.q1_right.id)}
+        self.assertEqual(grade_submission(self.quiz, answers).total_questions, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            q3 = Question.objects.create(quiz=self.quiz, text='Third?', order=3)
+        self.assertEqual(grade_submission(self.quiz, answers).total_questions, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            q3.delete()
+            self.q2.delete()
+        result = grade_submission(self.quiz, answers)
+        self.assertEqual((result.total_questions, result.score), (1, 100.0))
+
+    def test_answer_key_rebuilt_only_after_commit(self):
+        answers = {f'question_{self.q1.id}': str(self.q1_wrong.id)}
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 0)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                self.q1_wrong.is_correct = True
+                self.q1_wrong.save()
+            # Not committed yet: the quiz version is unchanged, the cached key still answers
+            self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 0)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(grade_submission(self.quiz, answers).correct_answers, 1)
+
+
+class QuizPaperTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = CustomUser.objects.create_user('teacher', 'teacher@example.com', 'password', role='teacher')
+        course = Course.objects.create(title='Python', description='Basics', price=0, is_free=True)
+        offering = CourseOffering.objects.create(
+            course=course, teacher=teacher, semester='Spring', year=2026,
+            start_date=date(2026, 1, 1), end_date=date(2026, 4, 1),
+        )
+        self.quiz = Quiz.objects.create(course_offering=offering, title='Quiz')
+        self.second = Question.objects.create(quiz=self.quiz, text='Second?', order=2)
+        self.first = Question.objects.create(quiz=self.quiz, text='First?', order=1)
+        self.choice = Choice.objects.create(question=self.first, text='Yes', is_correct=True)
+        self.other = Choice.objects.create(question=self.first, text='No')
+
+    def test_paper_in_order_without_correct_flags(self):
+        paper = get_quiz_paper(self.quiz.id)
+        self.assertEqual([q['text'] for q in paper], ['First?', 'Second?'])
+        self.assertEqual(paper[0]['choices'], [{'id': self.choice.id, 'text': 'Yes'}, {'id': self.other.id, 'text': 'No'}])
+        self.assertEqual(paper[1]['choices'], [])
+
+    def test_paper_is_cached(self):
+        get_quiz_paper(self.quiz.id)
+        with self.assertNumQueries(0):
+            get_quiz_paper(self.quiz.id)
+
+    def test_paper_rebuilt_after_commit(self):
+        get_quiz_paper(self.quiz.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.choice.text = 'Definitely'
+            self.choice.save()
+            self.assertEqual(get_quiz_paper(self.quiz.id)[0]['choices'][0]['text'], 'Yes')
+        self.assertEqual(get_quiz_paper(self.quiz.id)[0]['choices'][0]['text'], 'Definitely')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.delete()
+        self.assertEqual([q['text'] for q in get_quiz_paper(self.quiz.id)], ['First?'])
+
+
+class ItemAnalysisTests(TestCase):
+    def setUp(self):
+        teacher = CustomUser.objects.create_user('teacher', 'teacher@example.com', 'password', role='teacher')
+        course = Course.objects.create(title='Python', description='Basics', price=0, is_free=True)
+        offering = CourseOffering.objects.create(
+            course=course, teacher=teacher, semester='Spring', year=2026,
+            start_date=date(2026, 1, 1), end_date=date(2026, 4, 1),
+        )
+        self.quiz = Quiz.objects.create(course_offering=offering, title='Quiz')
+        self.question = Question.objects.create(quiz=self.quiz, text='Q?', order=1)
+        self.right = Choice.objects.create(question=self.question, text='Right', is_correct=True)
+        self.wrong = Choice.objects.create(question=self.question, text='Wrong')
+        # Four attempts: right, right, wrong, unanswered
+        for n, choice in enumerate([self.right, self.right, self.wrong, None]):
+            student = CustomUser.objects.create_user(f'student{n}', f'student{n}@example.com', 'password', role='student')
+            is_correct = choice == self.right
+            attempt = StudentQuizAttempt.objects.create(student=student, quiz=self.quiz, score=100 * is_correct, passed=is_correct)
+            QuizAnswer.objects.create(attempt=attempt, question=self.question, choice=choice, is_correct=is_correct)
+
+    def test_load_answers_in_one_query(self):
+        with self.assertNumQueries(1):
+            answers = _load_answers(self.quiz.id)
+        self.assertEqual(len(answers), 4)
+        self.assertEqual(sorted(answers['choice'].tolist()), sorted([self.right.id, self.right.id, self.wrong.id, -1]))
+
+    def test_statistics(self):
+        report = item_analysis(self.quiz.id)
+        self.assertEqual(report['attempts'], 4)
+        [question] = report['questions']
+        self.assertEqual(question['difficulty'], 0.5)
+        self.assertEqual(question['discrimination'], 1.0)
+        self.assertEqual(question['unanswered'], 1)
+        self.assertEqual(
+            [(c['id'], c['count'], c['proportion']) for c in question['choices']],
+            [(self.right.id, 2, 0.5), (self.wrong.id, 1, 0.25)],
+        )
+
+
+class EntitlementsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = CustomUser.objects.create_user('teacher', 'teacher@example.com', 'password', role='teacher')
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'password', role='student')
+        self.course = Course.objects.create(title='Python', description='Basics', price=10)
+        self.offering = CourseOffering.objects.create(
+            course=self.course, teacher=teacher, semester='Spring', year=2026,
+            start_date=date(2026, 1, 1), end_date=date(2026, 4, 1),
+        )
+
+    def entitlements(self):
+        # A new request each time, so only the cross-request cache can be reused
+        request = RequestFactory().get('/')
+        request.user = self.student
+        return get_entitlements(request)
+
+    def pay(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                student=self.student, course=self.course, amount=10, payment_method='upi',
+                status='success', transaction_id='TXN1',
+            )
+
+    def test_memoized_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.student
+        get_entitlements(request)
+        with self.assertNumQueries(0):
+            get_entitlements(request)
+
+    def test_access_from_payment_and_enrollment(self):
+        self.assertFalse(self.entitlements().can_access_course(self.course.id))
+        self.pay()
+        self.assertTrue(self.entitlements().has_paid_course(self.course.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course_offering=self.offering)
+        entitlements = self.entitlements()
+        self.assertTrue(entitlements.is_enrolled_in_offering(self.offering.id))
+        self.assertEqual(entitlements.accessible_course_ids, {self.course.id})
+
+    @override_settings(ENTITLEMENTS_CACHE=None)
+    def test_payment_seen_by_another_worker_without_shared_cache(self):
+        # Worker B has its own process memory; the payment is handled by this one
+        worker_b = {'default': LocMemCache('worker-b', {})}
+        with mock.patch('courses.entitlements.caches', worker_b):
+            self.assertFalse(self.entitlements().has_paid_course(self.course.id))
+        self.pay()
+        with mock.patch('courses.entitlements.caches', worker_b):
+            self.assertTrue(self.entitlements().has_paid_course(self.course.id))
+
+    @override_settings(ENTITLEMENTS_CACHE='default')
+    def test_shared_cache_dropped_on_payment(self):
+        self.assertFalse(self.entitlements().has_paid_course(self.course.id))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.entitlements().has_paid_course(self.course.id))
+        self.pay()
+        self.assertTrue(self.entitlements().has_paid_course(self.course.id))
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        invalidate_course_index()
+        self.in_title = Course.objects.create(title='Python for beginners', description='Start coding', price=0)
+        self.in_description = Course.objects.create(title='Data science', description='Uses python and pandas', price=0)
+        Course.objects.create(title='Algebra', description='Equations', price=0)
+
+    def search(self, query):
+        return list(search_courses(Course.objects.all(), query).values_list('id', flat=True))
+
+    def test_prefix_match_ranks_title_first(self):
+        self.assertEqual(self.search('pyth'), [self.in_title.id, self.in_description.id])
+
+    def test_every_token_must_match(self):
+        self.assertEqual(self.search('pyth pand'), [self.in_description.id])
+        self.assertEqual(self.search('pyth equa'), [])
+
+    def test_index_rebuilt_after_course_saved_and_deleted(self):
+        self.assertEqual(self.search('rust'), [])
+        course = Course.objects.create(title='Rust basics', description='Ownership', price=0)
+        self.assertEqual(self.search('rust'), [course.id])
+
+        course.title = 'Go basics'
+        course.save()
+        self.assertEqual(self.search('rust'), [])
+
+        course.delete()
+        self.assertEqual(self.search('go'), [])
+
+    def test_index_built_from_primary(self):
+        routing = RequestRouting()
+        routing.replica = 'missing-replica'
+        token = _routing.set(routing)
+        try:
+            with self.assertRaises(ConnectionDoesNotExist):
+                Course.objects.count()  # routed reads would go to the (missing) replica
+            self.assertEqual(get_course_index().search('pyth'), [self.in_title.id, self.in_description.id])
+        finally:
+            _routing.reset(token)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['local'].clear()
+        self.teacher = CustomUser.objects.create_user('teacher', 'teacher@example.com', 'password', role='teacher')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = Course.objects.create(title='Python', description='Basics', price=0)
+
+    def titles(self):
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        return [course['title'] for course in response.json()]
+
+    def test_generation_bumped_only_after_commit(self):
+        generation = catalog_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.course.title = 'Rust'
+            self.course.save()
+            self.assertEqual(catalog_generation(), generation)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(catalog_generation(), generation)
+
+    def test_offering_changes_bump_generation(self):
+        generation = catalog_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            offering = CourseOffering.objects.create(
+                course=self.course, teacher=self.teacher, semester='Spring', year=2026,
+                start_date=date(2026, 1, 1), end_date=date(2026, 4, 1),
+            )
+        self.assertGreater(catalog_generation(), generation)
+
+        generation = catalog_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            offering.delete()
+        self.assertGreater(catalog_generation(), generation)
+
+    def test_cached_payload_retired_after_course_change(self):
+        self.assertEqual(self.titles(), ['Python'])
+        # A change the signals do not see keeps serving the cached payload...
+        Course.objects.filter(pk=self.course.pk).update(title='Stale')
+        self.assertEqual(self.titles(), ['Python'])
+        # ...one they do retires it in both tiers
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.title = 'Rust'
+            self.course.save()
+        self.assertEqual(self.titles(), ['Rust'])
+
+    def test_generation_recreated_after_eviction_is_new(self):
+        generation = catalog_generation()
+        cache.delete(GENERATION_KEY)
+        self.assertGreater(catalog_generation(), generation)
+
+
+class EmailOutboxTests(TestCase):
+    def enqueue(self, **kwargs):
+        return enqueue_email('student@example.com', 'Subject', '<p>Hi</p>', **kwargs)
+
+    def test_sent(self):
+        message = self.enqueue()
+        [claimed] = claim_batch(10)
+        self.assertEqual(record_result(claimed, True, 'ok'), 'sent')
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('sent', 1))
+        self.assertIsNotNone(message.sent_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        message = self.enqueue()
+        [claimed] = claim_batch(10)
+        self.assertEqual(claim_batch(10), [])  # leased to this worker
+        self.assertEqual(record_result(claimed, False, 'timeout'), 'pending')
+
+        message.refresh_from_db()
+        self.assertEqual((message.attempts, message.last_error), (1, 'timeout'))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertEqual(claim_batch(10), [])  # not due yet
+
+        EmailOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual([m.pk for m in claim_batch(10)], [message.pk])
+
+    def test_gives_up_after_max_attempts(self):
+        message = self.enqueue()
+        EmailOutbox.objects.filter(pk=message.pk).update(attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS - 1)
+        [claimed] = claim_batch(10)
+        self.assertEqual(record_result(claimed, False, 'rejected'), 'failed')
+
+    def test_expired_instead_of_retried_past_expiry(self):
+        message = self.enqueue(expires_at=timezone.now() + timedelta(seconds=10))
+        [claimed] = claim_batch(10)
+        self.assertEqual(record_result(claimed, False, 'timeout'), 'expired')
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'expired')
+
+    def test_due_message_past_expiry_is_not_claimed(self):
+        expired = self.enqueue(expires_at=timezone.now() - timedelta(seconds=1))
+        current = self.enqueue(expires_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual([m.pk for m in claim_batch(10)], [current.pk])
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'expired')
+
+    def test_otp_email_expires_with_the_otp(self):
+        self.client.post('/register/', {
+            'username': 'newstudent', 'email': 'new@example.com', 'role': 'student',
+            'password1': 'a-long-password-1', 'password2': 'a-long-password-1',
+        })
+        user = CustomUser.objects.get(username='newstudent')
+        message = EmailOutbox.objects.get(to_email='new@example.com')
+        self.assertEqual(message.expires_at, user.otp_created_at + timedelta(minutes=settings.OTP_EXPIRY_MINUTES))
+
+
+class LoginNotificationPolicyTests(TestCase):
+    def setUp(self):
+        caches[settings.LOGIN_NOTIFICATION_CACHE].clear()
+        self.user = CustomUser.objects.create_user('student', 'student@example.com', 'password', role='student')
+
+    def test_new_device_then_coalesced_then_known(self):
+        self.assertEqual(login_notification_decision(self.user, '10.0.0.1', 'Firefox'), SEND)
+        self.assertEqual(login_notification_decision(self.user, '10.0.0.1', 'Firefox'), COALESCED)
+        self.assertEqual(login_notification_decision(self.user, '10.0.0.2', 'Firefox'), KNOWN_DEVICE)
+        self.assertEqual(login_notification_decision(self.user, '10.0.0.2', 'Safari'), SEND)
+
+    def test_known_devices_are_shared_between_processes(self):
+        self.assertNotIsInstance(caches[settings.LOGIN_NOTIFICATION_CACHE], LocMemCache)
+        login_notification_decision(self.user, '10.0.0.1', 'Firefox')
+
+        # A fresh cache connection, as another worker (or a restarted one) would have
+        other_worker = {settings.LOGIN_NOTIFICATION_CACHE: caches.create_connection(settings.LOGIN_NOTIFICATION_CACHE)}
+        with mock.patch('courses.notification_policy.caches', other_worker):
+            self.assertEqual(login_notification_decision(self.user, '10.0.0.2', 'Firefox'), KNOWN_DEVICE)
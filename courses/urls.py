@@ -23,6 +23,7 @@ urlpatterns = [
     # Quiz URLs
     path('dashboard/teacher/offering/<int:offering_id>/add_quiz/', views.add_quiz, name='add_quiz'),
     path('dashboard/teacher/quiz/<int:quiz_id>/manage/', views.manage_quiz, name='manage_quiz'),
+    path('dashboard/teacher/quiz/<int:quiz_id>/analysis/', views.quiz_item_analysis, name='quiz_item_analysis'),
     path('dashboard/teacher/quiz/<int:quiz_id>/delete/', views.delete_quiz, name='delete_quiz'),
     path('dashboard/teacher/quiz/<int:quiz_id>/add_question/', views.add_question, name='add_question'),
     path('dashboard/teacher/question/<int:question_id>/add_choice/', views.add_choice, name='add_choice'),
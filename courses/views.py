@@ -2,7 +2,7 @@ from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
-from .models import Course, CourseOffering, CustomUser, Enrollment, CourseContent, Quiz, Question, Choice, StudentQuizAttempt, Certificate
+from .models import Course, CourseOffering, CustomUser, Enrollment, CourseContent, Quiz, Question, Choice, StudentQuizAttempt, QuizAnswer, Certificate
 from .forms import CourseForm, EnrollmentForm, CustomUserCreationForm, CourseContentForm, QuizForm, QuestionForm, ChoiceForm, QuestionWithChoicesForm
 from django.contrib import messages
 from django.template.loader import render_to_string
@@ -12,7 +12,14 @@ from django.utils.encoding import force_bytes, force_str
 from .tokens import account_activation_token
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from .brevo_email import send_brevo_email
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from .db_router import read_replica
+from .email_outbox import enqueue_email
+from .entitlements import get_entitlements
+from .grading import grade_submission
+from .item_analysis import item_analysis
+from .quiz_paper import get_quiz_paper
 
 def register(request):
     if request.method == 'POST':
@@ -22,6 +29,7 @@ def register(request):
             user.is_active = False 
 
             import random
+            from datetime import timedelta
             from django.utils import timezone
             otp = str(random.randint(100000, 999999))
             user.otp = otp
@@ -35,20 +43,16 @@ def register(request):
             }
             html_message = render_to_string('emails/otp_verification.html', context)
             
-            result = send_brevo_email(
+            enqueue_email(
                 to_email=user.email,
                 subject='Verify Your Email - Learning Platform',
-                html_content=html_message
+                html_content=html_message,
+                expires_at=user.otp_created_at + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
             )
             
-            if result['success']:
-                request.session['pending_user_id'] = user.id
-                messages.success(request, f'Registration successful! Please check your email ({user.email}) for the OTP code.')
-                return redirect('verify_otp')
-            else:
-                user.delete()
-                messages.error(request, f'Failed to send verification email: {result["message"]}')
-                return redirect('register')
+            request.session['pending_user_id'] = user.id
+            messages.success(request, f'Registration successful! Please check your email ({user.email}) for the OTP code.')
+            return redirect('verify_otp')
     else:
         form = CustomUserCreationForm()
     return render(request, 'registration/register.html', {'form': form})
@@ -82,7 +86,7 @@ def verify_otp(request):
             if timezone.is_naive(otp_created):
                 otp_created = timezone.make_aware(otp_created)
             
-            expiry_time = otp_created + timedelta(minutes=10)
+            expiry_time = otp_created + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
             if timezone.now() > expiry_time:
                 messages.error(request, 'OTP has expired. Please register again.')
                 user.delete()
@@ -100,16 +104,11 @@ def verify_otp(request):
         }
         html_message = render_to_string('emails/welcome.html', context)
         
-        try:
-            result = send_brevo_email(
-                to_email=user.email,
-                subject='Welcome to Learning Platform!',
-                html_content=html_message
-            )
-            if not result['success']:
-                print(f"Failed to send welcome email: {result['message']}")
-        except Exception as e:
-            print(f"Failed to send welcome email: {e}")
+        enqueue_email(
+            to_email=user.email,
+            subject='Welcome to Learning Platform!',
+            html_content=html_message
+        )
         
         if 'pending_user_id' in request.session:
             del request.session['pending_user_id']
@@ -136,6 +135,7 @@ def dashboard(request):
     return render(request, 'dashboard/base_dashboard.html')
 
 
+@read_replica
 @login_required
 def admin_dashboard(request):
     if request.user.role != 'admin':
@@ -151,7 +151,8 @@ def admin_dashboard(request):
         
     return render(request, 'dashboard/admin_dashboard.html', {'form': form})
 
-@login_required 
+@read_replica
+@login_required
 def teacher_dashboard(request):
     if request.user.role != 'teacher':
         return redirect('dashboard')
@@ -198,6 +199,7 @@ def teacher_dashboard(request):
 
     return render(request, 'dashboard/teacher_dashboard.html', {'offerings': offerings})
 
+@read_replica
 @login_required
 def student_dashboard(request):
     if request.user.role != 'student':
@@ -208,6 +210,7 @@ def student_dashboard(request):
 def available_courses(request):
     return render(request, 'dashboard/available_courses.html')
 
+@read_replica
 @login_required
 def student_course_detail(request, course_id):
     if request.user.role != 'student':
@@ -215,16 +218,9 @@ def student_course_detail(request, course_id):
     course = get_object_or_404(Course, id=course_id)
     offerings = CourseOffering.objects.filter(course=course)
     
-    has_paid = Payment.objects.filter(
-        student=request.user,
-        course=course,
-        status='success'
-    ).exists()
-
-    is_enrolled = Enrollment.objects.filter(
-        student=request.user,
-        course_offering__course=course
-    ).exists()
+    entitlements = get_entitlements(request)
+    has_paid = entitlements.has_paid_course(course.id)
+    is_enrolled = entitlements.is_enrolled_in_course(course.id)
     
     has_access = has_paid or is_enrolled
     
@@ -232,7 +228,7 @@ def student_course_detail(request, course_id):
         offering_id = request.POST.get('offering_id')
         offering = get_object_or_404(CourseOffering, id=offering_id)
         
-        if Enrollment.objects.filter(student=request.user, course_offering=offering).exists():
+        if entitlements.is_enrolled_in_offering(offering.id):
             messages.warning(request, 'You are already enrolled in this course offering.')
         else:
            
@@ -267,6 +263,7 @@ def student_course_detail(request, course_id):
         'has_access': has_access
     })
 
+@read_replica
 @login_required
 def course_content_view(request, course_id):
     if request.user.role != 'student':
@@ -274,19 +271,36 @@ def course_content_view(request, course_id):
         
     course = get_object_or_404(Course, id=course_id)
     
-    has_paid = Payment.objects.filter(student=request.user, course=course, status='success').exists()
-    is_enrolled = Enrollment.objects.filter(student=request.user, course_offering__course=course).exists()
-    
-    if not (has_paid or is_enrolled):
+    if not get_entitlements(request).can_access_course(course.id):
         messages.error(request, 'You need to enroll in this course to view content.')
         return redirect('student_course_detail', course_id=course.id)
     
-    offerings = CourseOffering.objects.filter(course=course).prefetch_related('contents', 'quizzes')
-    contents_count = sum(offering.contents.count() for offering in offerings)
+    latest_attempt = StudentQuizAttempt.objects.filter(
+        student=request.user,
+        quiz=OuterRef('pk')
+    ).order_by('-completed_at', '-id').values('id')[:1]
+    offerings = list(
+        CourseOffering.objects.filter(course=course)
+        .select_related('teacher')
+        .annotate(contents_total=Count('contents'))
+        .prefetch_related(
+            'contents',
+            Prefetch(
+                'quizzes',
+                queryset=Quiz.objects.order_by('pk').annotate(latest_attempt_id=Subquery(latest_attempt)),
+                to_attr='prefetched_quizzes'
+            )
+        )
+    )
+    contents_count = sum(offering.contents_total for offering in offerings)
+    
+    for offering in offerings:
+        offering.quiz = offering.prefetched_quizzes[0] if offering.prefetched_quizzes else None
+    attempt_ids = [o.quiz.latest_attempt_id for o in offerings if o.quiz and o.quiz.latest_attempt_id]
+    attempts = StudentQuizAttempt.objects.in_bulk(attempt_ids) if attempt_ids else {}
     for offering in offerings:
-        offering.quiz = offering.quizzes.first()
         if offering.quiz:
-            offering.attempt = StudentQuizAttempt.objects.filter(student=request.user, quiz=offering.quiz).order_by('-completed_at').first()
+            offering.attempt = attempts.get(offering.quiz.latest_attempt_id)
     
     return render(request, 'dashboard/course_content.html', {
         'course': course,
@@ -301,13 +315,8 @@ def course_payment_page(request, course_id):
         return redirect('dashboard')
     
     course = get_object_or_404(Course, id=course_id)
-    existing_payment = Payment.objects.filter(
-        student=request.user,
-        course=course,
-        status='success'
-    ).first()
     
-    if existing_payment:
+    if get_entitlements(request).has_paid_course(course.id):
         messages.info(request, 'You have already paid for this course. Please select your teacher.')
         return redirect('student_course_detail', course_id=course.id)
     
@@ -345,19 +354,14 @@ def payment_page(request, offering_id):
     if request.user.role != 'student':
         return redirect('dashboard')
     
-    offering = get_object_or_404(CourseOffering, id=offering_id)
+    offering = get_object_or_404(CourseOffering.objects.select_related('course'), id=offering_id)
     course = offering.course
-    if Enrollment.objects.filter(student=request.user, course_offering=offering).exists():
+    entitlements = get_entitlements(request)
+    if entitlements.is_enrolled_in_offering(offering.id):
         messages.info(request, 'You are already enrolled in this course.')
         return redirect('student_dashboard')
     
-    existing_payment = Payment.objects.filter(
-        student=request.user, 
-        course_offering=offering,
-        status='success'
-    ).first()
-    
-    if existing_payment:
+    if entitlements.has_paid_offering(offering.id):
         messages.info(request, 'Payment already completed for this course.')
         return redirect('student_dashboard')
     
@@ -478,14 +482,19 @@ def paypal_cancel(request):
     return redirect('student_dashboard')
 
 
-from rest_framework import viewsets, permissions, filters
+from rest_framework import mixins, viewsets, permissions
+from rest_framework.response import Response
+from .catalog_cache import get_catalog_payload, merge_user_fields
+from .conditional import conditional_response, table_state
 from .models import Payment
-from .serializers import CourseSerializer, UserSerializer, CourseOfferingSerializer, EnrollmentSerializer, PaymentSerializer
+from .serializers import CatalogEntrySerializer, CourseSerializer, UserSerializer, CourseOfferingSerializer, EnrollmentSerializer, PaymentSerializer
+from .search import CourseSearchFilter
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all() 
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = 'id'
 
     def get_queryset(self):
         queryset = CustomUser.objects.all()
@@ -498,43 +507,141 @@ class CourseOfferingViewSet(viewsets.ModelViewSet):
     queryset = CourseOffering.objects.all()
     serializer_class = CourseOfferingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
+    read_replica = True
+
+    def include_contents(self):
+        # ?contents=false returns only the offering header without nested contents
+        return self.request.query_params.get('contents', 'true').lower() not in ('false', '0', 'no')
 
     def get_queryset(self):
-        queryset = CourseOffering.objects.all()
+        queryset = CourseOfferingSerializer.setup_eager_loading(CourseOffering.objects.all(), self.include_contents())
         if self.request.user.role == 'teacher':
              queryset = queryset.filter(teacher=self.request.user)
         return queryset
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_contents'] = self.include_contents()
+        return context
+
+    def offering_states(self, queryset):
+        """Validators of the offerings in queryset: the offerings, their courses, quizzes and contents"""
+        offering_ids = queryset.values('pk')
+        states = [
+            table_state(queryset),
+            table_state(Course.objects.all()),
+            table_state(Quiz.objects.filter(course_offering__in=offering_ids), latest='pk'),
+        ]
+        if self.include_contents():
+            states.append(table_state(CourseContent.objects.filter(course_offering__in=offering_ids)))
+        return states
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            lambda: self.offering_states(self.filter_queryset(self.get_queryset())),
+            lambda: super(CourseOfferingViewSet, self).list(request, *args, **kwargs),
+            extra=(request.user.pk, request.accepted_renderer.format),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            lambda: self.offering_states(self.get_queryset().filter(pk=kwargs[self.lookup_field])),
+            lambda: super(CourseOfferingViewSet, self).retrieve(request, *args, **kwargs),
+            extra=(request.user.pk, request.accepted_renderer.format),
+        )
+
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter]
+    cursor_ordering = ('-created_at', '-id')
+    read_replica = True
+    filter_backends = [CourseSearchFilter]
     search_fields = ['title', 'description']
 
+    def get_queryset(self):
+        return CourseSerializer.setup_eager_loading(Course.objects.all())
+
+    def user_validators(self, request):
+        # Inputs of the payload that are not in the tables: who asks, in which format, and what they paid for
+        return (request.user.pk, request.accepted_renderer.format, tuple(sorted(get_entitlements(request).paid_course_ids)))
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            lambda: [table_state(Course.objects.all()), table_state(CourseOffering.objects.all())],
+            lambda: self.cached_list(request, *args, **kwargs),
+            extra=self.user_validators(request),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        return conditional_response(
+            request,
+            lambda: [table_state(Course.objects.filter(pk=pk)), table_state(CourseOffering.objects.filter(course_id=pk))],
+            lambda: self.cached_retrieve(request, *args, **kwargs),
+            extra=self.user_validators(request),
+        )
+
+    def cached_list(self, request, *args, **kwargs):
+        # Shared cached payload (see catalog_cache.py) + this user's fields
+        data = get_catalog_payload(request, 'list', lambda: super(CourseViewSet, self).list(request, *args, **kwargs).data)
+        merge_user_fields(request, data['results'] if isinstance(data, dict) else data)
+        return Response(data)
+
+    def cached_retrieve(self, request, *args, **kwargs):
+        data = get_catalog_payload(request, 'detail', lambda: super(CourseViewSet, self).retrieve(request, *args, **kwargs).data)
+        merge_user_fields(request, [data])
+        return Response(data)
+
+class CatalogViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    The course catalog for the requesting user: every course with its
+    is_enrolled / has_paid / has_access state, in one query.
+    Supports ?search= and opt-in ?page_size= pagination (keyset, or by
+    page number in relevance order when searching).
+    """
+    serializer_class = CatalogEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
+    read_replica = True
+    filter_backends = [CourseSearchFilter]
+    search_fields = ['title', 'description']
+
+    def get_queryset(self):
+        return CatalogEntrySerializer.setup_eager_loading(Course.objects.all(), self.request.user)
+
 class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated] 
+    cursor_ordering = ('-enrolled_at', '-id')
+    read_replica = True
 
     def get_queryset(self):
         user = self.request.user
+        queryset = EnrollmentSerializer.setup_eager_loading(Enrollment.objects.all())
         if user.role == 'student':
-            return Enrollment.objects.filter(student=user)
+            return queryset.filter(student=user)
         elif user.role == 'teacher':
-             return Enrollment.objects.filter(course_offering__teacher=user)
-        return Enrollment.objects.all()
+             return queryset.filter(course_offering__teacher=user)
+        return queryset
 
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         user = self.request.user
+        queryset = PaymentSerializer.setup_eager_loading(Payment.objects.all())
         if user.role == 'student':
-            return Payment.objects.filter(student=user)
-        return Payment.objects.all()
+            return queryset.filter(student=user)
+        return queryset
     
     def perform_create(self, serializer):
         payment = serializer.save()
@@ -571,10 +678,24 @@ def manage_quiz(request, quiz_id):
     if request.user.role != 'teacher':
         return redirect('dashboard')
     
-    quiz = get_object_or_404(Quiz, id=quiz_id, course_offering__teacher=request.user)
+    quiz = get_object_or_404(
+        Quiz.objects.prefetch_related('questions__choices'),
+        id=quiz_id,
+        course_offering__teacher=request.user
+    )
     
     return render(request, 'courses/manage_quiz.html', {'quiz': quiz})
 
+@login_required
+def quiz_item_analysis(request, quiz_id):
+    if request.user.role != 'teacher':
+        return redirect('dashboard')
+    
+    quiz = get_object_or_404(Quiz, id=quiz_id, course_offering__teacher=request.user)
+    report = item_analysis(quiz.id)
+    
+    return render(request, 'courses/quiz_analysis.html', {'quiz': quiz, 'report': report})
+
 @login_required
 def delete_quiz(request, quiz_id):
     if request.user.role != 'teacher':
@@ -678,12 +799,11 @@ def take_quiz(request, quiz_id):
     
     quiz = get_object_or_404(Quiz, id=quiz_id)
     
-    is_enrolled = Enrollment.objects.filter(student=request.user, course_offering=quiz.course_offering).exists()
-    if not is_enrolled:
+    if not get_entitlements(request).is_enrolled_in_offering(quiz.course_offering_id):
         messages.error(request, 'You need to be enrolled to take this quiz.')
         return redirect('student_dashboard')
 
-    questions = quiz.questions.all()
+    questions = get_quiz_paper(quiz.id)
     
     return render(request, 'courses/take_quiz.html', {'quiz': quiz, 'questions': questions})
 
@@ -693,28 +813,27 @@ def submit_quiz(request, quiz_id):
         return redirect('dashboard')
     
     quiz = get_object_or_404(Quiz, id=quiz_id)
-    questions = quiz.questions.all()
-    total_questions = questions.count()
-    correct_answers = 0
     
     if request.method == 'POST':
-        for question in questions:
-            selected_choice_id = request.POST.get(f'question_{question.id}')
-            if selected_choice_id:
-                choice = Choice.objects.get(id=selected_choice_id)
-                if choice.is_correct:
-                    correct_answers += 1
+        result = grade_submission(quiz, request.POST)
         
-        score_percentage = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-        passed = score_percentage >= quiz.pass_percentage
-        
-        attempt = StudentQuizAttempt.objects.create(
-            student=request.user,
-            quiz=quiz,
-            score=score_percentage,
-            passed=passed
-        )
-        if passed:
+        with transaction.atomic():
+            attempt = StudentQuizAttempt.objects.create(
+                student=request.user,
+                quiz=quiz,
+                score=result.score,
+                passed=result.passed
+            )
+            QuizAnswer.objects.bulk_create([
+                QuizAnswer(
+                    attempt=attempt,
+                    question_id=question_id,
+                    choice_id=choice_id,
+                    is_correct=question_id in result.correct_question_ids
+                )
+                for question_id, choice_id in result.selections.items()
+            ])
+        if result.passed:
             if not Certificate.objects.filter(student=request.user, course_offering=quiz.course_offering).exists():
                 Certificate.objects.create(
                     student=request.user,
@@ -734,25 +853,36 @@ def quiz_result(request, attempt_id):
         
     return render(request, 'courses/quiz_result.html', {'attempt': attempt, 'certificate': certificate})
 
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+from django.http import HttpResponse, FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .certificates import CertificateRenderError, certificate_etag, ensure_certificate_file
 
 @login_required
 def download_certificate(request, certificate_id):
-    certificate = get_object_or_404(Certificate, certificate_id=certificate_id, student=request.user)
-    
-    template_path = 'courses/certificate_pdf.html'
-    context = {'certificate': certificate}
-    
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="certificate_{certificate.student.username}.pdf"'
-    
-    template = get_template(template_path)
-    html = template.render(context)
-    
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    
-    if pisa_status.err:
-        return HttpResponse('We had some errors <pre>' + html + '</pre>')
+    certificate = get_object_or_404(
+        Certificate.objects.select_related('student', 'course_offering__course'),
+        certificate_id=certificate_id,
+        student=request.user
+    )
+    
+    try:
+        ensure_certificate_file(certificate)
+    except CertificateRenderError as e:
+        return HttpResponse('We had some errors <pre>' + e.html + '</pre>')
+    
+    etag = certificate_etag(certificate)
+    last_modified = int(certificate.rendered_at.timestamp()) if certificate.rendered_at else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(
+            certificate.file.open('rb'),
+            as_attachment=True,
+            filename=f'certificate_{certificate.student.username}.pdf',
+            content_type='application/pdf'
+        )
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
     return response